@@ -0,0 +1,79 @@
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+import cache
+import stats
+import timeseries
+
+
+@dataclass
+class Daily:
+    energy: pd.DataFrame
+    hours: pd.Series
+    cumulative_energy: np.ndarray
+    cumulative_hours: np.ndarray
+
+
+@cache.memo(maxsize=8)
+def get_daily(power):
+    """
+    Calculate the energy of each day and the prefix sums of the daily energy and hours, so the
+    average over any number of days only takes a subtraction.
+
+    Returns:
+        Daily: The energy (MWh) and number of hours of each day and their cumulative sums
+    """
+    timestep = timeseries.get_timestep(power.index)
+    days = power.index.normalize()
+    energy = power.astype(np.float64).groupby(days).sum() * timestep
+    hours = pd.Series(timestep, index=days).groupby(level=0).sum()
+    zeros = np.zeros((1, energy.shape[1]))
+    return Daily(
+        energy=energy,
+        hours=hours,
+        cumulative_energy=np.concatenate([zeros, np.cumsum(energy.to_numpy(), axis=0)]),
+        cumulative_hours=np.concatenate([[0], np.cumsum(hours.to_numpy())]),
+    )
+
+
+def rolling_mean(daily, window):
+    """
+    Calculate the average power over a rolling window of days from the prefix sums.
+
+    Returns:
+        DataFrame: DataFrame with the average power (MW) over the window that ends on each day, which is missing for the first days
+    """
+    energy = daily.cumulative_energy[window:] - daily.cumulative_energy[:-window]
+    hours = daily.cumulative_hours[window:] - daily.cumulative_hours[:-window]
+    power = np.full(daily.energy.shape, np.nan)
+    power[window - 1 :] = energy / hours[:, np.newaxis]
+    return pd.DataFrame(power, index=daily.energy.index, columns=daily.energy.columns)
+
+
+def summarize(chunks):
+    """
+    Summarize the wind, PV, and combined production in a single pass over chunks of rows, so the
+    series do not need to fit in memory and the combined production is only added per chunk.
+
+    Returns:
+        dict: Dictionary with the summary of the wind, PV, and combined production (MW)
+    """
+    summaries = {name: stats.Summary() for name in ["wind", "pv", "total"]}
+    for chunk in chunks:
+        production_wind = chunk.production_wind.to_numpy(dtype=np.float64)
+        production_pv = chunk.production_pv.to_numpy(dtype=np.float64)
+        summaries["wind"].update(production_wind)
+        summaries["pv"].update(production_pv)
+        summaries["total"].update(production_wind + production_pv)
+    return summaries
+
+
+@cache.memo(maxsize=8)
+def get_statistics(production):
+    """
+    Summarize the production of the model results, which only changes with the parameters.
+
+    Returns:
+        dict: Dictionary with the summary of the wind, PV, and combined production (MW)
+    """
+    return summarize(stats.iterate_chunks(production))
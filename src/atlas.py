@@ -0,0 +1,162 @@
+import argparse
+import functools
+import json
+import os
+import numpy as np
+import pandas as pd
+import cache
+
+# Increase the version when the PV model changes, so old atlases are no longer used
+version = 2
+
+# Path of the atlas, which is in the cache directory when it is not set
+filename = None
+
+
+def get_filename():
+    """
+    Get the path of the atlas, which is resolved on every call so it follows the cache directory.
+
+    Returns:
+        str: Path of the atlas
+    """
+    return filename or os.path.join(cache.directory, "pv_atlas.npy")
+
+
+def _get_key(weather, latitude, longitude):
+    return cache.fingerprint(weather, latitude, longitude, version)
+
+
+def create(filename, weather, latitude, longitude, *, tilts, azimuths):
+    """
+    Create an empty atlas file that should be filled with the profile of each tilt and azimuth.
+
+    The profiles and metadata are written to temporary files, which only replace the atlas once
+    `save` is called, so an interrupted build leaves the previous atlas intact.
+
+    Returns:
+        memmap: Writable array with the shape (tilts, azimuths, timesteps)
+    """
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+    shape = (len(tilts), len(azimuths), len(weather.index))
+    profiles = np.lib.format.open_memmap(
+        f"{filename}.tmp", mode="w+", dtype=np.float32, shape=shape
+    )
+
+    metadata = {
+        "key": _get_key(weather, latitude, longitude),
+        "tilts": [float(tilt) for tilt in tilts],
+        "azimuths": [float(azimuth) for azimuth in azimuths],
+    }
+    with open(f"{filename}.json.tmp", "w") as file:
+        json.dump(metadata, file)
+
+    return profiles
+
+
+def save(filename, profiles):
+    """
+    Replace the atlas with the filled profiles, the metadata is replaced after the profiles.
+    """
+    profiles.flush()
+    os.replace(f"{filename}.tmp", filename)
+    os.replace(f"{filename}.json.tmp", f"{filename}.json")
+
+
+def _get_file_key(filename):
+    status = os.stat(filename)
+    return status.st_mtime_ns, status.st_size
+
+
+@functools.lru_cache(maxsize=4)
+def _load(filename, profiles_key, metadata_key):
+    with open(f"{filename}.json") as file:
+        metadata = json.load(file)
+    profiles = np.load(filename, mmap_mode="r")
+    return metadata, profiles
+
+
+def _get_interpolation_weights(grid, value):
+    position = np.interp(value, grid, np.arange(len(grid)))
+    low = int(np.floor(position))
+    high = min(low + 1, len(grid) - 1)
+    return low, high, position - low
+
+
+def _interpolate(value_low, value_high, share):
+    return (1 - share) * value_low + share * value_high
+
+
+def lookup(weather, latitude, longitude, tilt, azimuth, *, filename=None):
+    """
+    Get the profile of a single PV panel from the atlas.
+
+    The profile is bilinearly interpolated between the four closest grid points. The atlas is read
+    from get_filename() unless another filename is given.
+
+    Returns:
+        Series: Series with the average power (MW) of one panel, or None if the atlas does not cover the request
+    """
+    filename = filename or get_filename()
+    if not os.path.exists(filename) or not os.path.exists(f"{filename}.json"):
+        return None
+
+    metadata, profiles = _load(
+        filename, _get_file_key(filename), _get_file_key(f"{filename}.json")
+    )
+    if metadata["key"] != _get_key(weather, latitude, longitude):
+        return None
+
+    # Ignore an atlas of which the profiles do not match the metadata
+    tilts = metadata["tilts"]
+    azimuths = metadata["azimuths"]
+    if profiles.shape != (len(tilts), len(azimuths), len(weather.index)):
+        return None
+    if not tilts[0] <= tilt <= tilts[-1] or not azimuths[0] <= azimuth <= azimuths[-1]:
+        return None
+
+    # Interpolate between the closest tilts and azimuths
+    tilt_low, tilt_high, tilt_share = _get_interpolation_weights(tilts, tilt)
+    azimuth_low, azimuth_high, azimuth_share = _get_interpolation_weights(
+        azimuths, azimuth
+    )
+    rows = [
+        np.asarray(profiles[tilt_index, [azimuth_low, azimuth_high]], dtype=float)
+        for tilt_index in [tilt_low, tilt_high]
+    ]
+    profile = _interpolate(
+        _interpolate(*rows[0], azimuth_share),
+        _interpolate(*rows[1], azimuth_share),
+        tilt_share,
+    )
+
+    return pd.Series(profile, index=weather.index)
+
+
+if __name__ == "__main__":
+    import knmi
+    import model
+    import pv
+
+    parser = argparse.ArgumentParser(
+        description="Precompute the output of a single PV panel for a grid of tilts and azimuths"
+    )
+    parser.add_argument("weather", help="path of the KNMI weather file")
+    parser.add_argument("year", type=int)
+    location = model.default_parameters()["location"]
+    parser.add_argument("--lat", type=float, default=location["lat"])
+    parser.add_argument("--lon", type=float, default=location["lon"])
+    parser.add_argument("--tilt-step", type=float, default=5)
+    parser.add_argument("--azimuth-step", type=float, default=10)
+    parser.add_argument("--output", help="path of the atlas, by default in the cache directory")
+    args = parser.parse_args()
+
+    data = knmi.import_data(args.weather, args.year)
+    pv.build_atlas(
+        cache.select(data, pv.columns),
+        latitude=args.lat,
+        longitude=args.lon,
+        tilts=np.arange(0, 90 + args.tilt_step / 2, args.tilt_step),
+        azimuths=np.arange(0, 360 + args.azimuth_step / 2, args.azimuth_step),
+        filename=args.output or get_filename(),
+    )
@@ -0,0 +1,14 @@
+import numpy as np
+
+
+def calculate(production, demand, battery_flow=0):
+    """
+    Calculate the curtailed and unserved energy for each timestep.
+
+    The battery flow is positive when the battery is charging and negative when it is discharging.
+
+    Returns:
+        tuple: The curtailed and unserved energy
+    """
+    surplus = production - demand - battery_flow
+    return np.maximum(surplus, 0), np.maximum(-surplus, 0)
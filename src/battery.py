@@ -0,0 +1,105 @@
+from dataclasses import dataclass
+import numpy as np
+import balance
+
+# Small batches are faster to simulate with plain floats than with a numpy operation per timestep
+_max_scalar_configurations = 16
+
+
+@dataclass
+class Simulation:
+    soc: np.ndarray
+    flow: np.ndarray
+    curtailed: np.ndarray
+    unserved: np.ndarray
+
+
+def _simulate_scalar(surplus, power_rating, energy_rating, efficiency, timestep):
+    # Plain floats avoid the overhead of numpy for every timestep of a single configuration
+    soc = [0.0] * len(surplus)
+    soc_prev = 0.0
+    capacity = energy_rating / timestep
+    for index, value in enumerate(surplus):
+        potential_flow = min(max(value * efficiency, -power_rating), power_rating)
+        soc_prev = min(max(soc_prev + potential_flow / capacity, 0.0), 1.0)
+        soc[index] = soc_prev
+    return soc
+
+
+def simulate(
+    surplus, power_ratings, energy_ratings, efficiencies, *, timestep=1, dtype=np.float64
+):
+    """
+    Simulate the state of charge of a batch of battery configurations.
+
+    The surplus is the production minus the demand (MW) for each timestep and can either be a single
+    series, which is shared by all configurations, or a matrix with a column for each configuration.
+    The power ratings, energy ratings, and efficiencies are broadcasted to the same length. The
+    timestep is the length of each timestep in hours, and the SOC and flow matrices are stored
+    with the given dtype to limit the memory of long simulations with many configurations. The
+    efficiency is applied when charging, and the flow is the change of the stored energy.
+
+    Returns:
+        Simulation: SOC and flow (MW) matrices (timesteps x configurations) and the total curtailed and unserved energy (MWh) per configuration
+    """
+    power_ratings, energy_ratings, efficiencies = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(power_ratings, dtype=float)),
+        np.atleast_1d(np.asarray(energy_ratings, dtype=float)),
+        np.atleast_1d(np.asarray(efficiencies, dtype=float)),
+    )
+    surplus = np.asarray(surplus, dtype=float)
+    if surplus.ndim == 1:
+        surplus = surplus[:, np.newaxis]
+    num_timesteps = surplus.shape[0]
+    num_configurations = max(power_ratings.size, surplus.shape[1])
+    power_ratings, energy_ratings, efficiencies = [
+        np.broadcast_to(values, num_configurations)
+        for values in (power_ratings, energy_ratings, efficiencies)
+    ]
+    surplus = np.broadcast_to(surplus, (num_timesteps, num_configurations))
+
+    soc = np.empty((num_timesteps, num_configurations), dtype=dtype)
+    if num_configurations <= _max_scalar_configurations:
+        for configuration in range(num_configurations):
+            soc[:, configuration] = _simulate_scalar(
+                surplus[:, configuration].tolist(),
+                float(power_ratings[configuration]),
+                float(energy_ratings[configuration]),
+                float(efficiencies[configuration]),
+                timestep,
+            )
+    else:
+        # Step through time once, while all configurations are updated at the same time
+        soc_prev = np.zeros(num_configurations)
+        for timestep_index in range(num_timesteps):
+            potential_flow = surplus[timestep_index] * efficiencies
+            potential_flow = np.clip(potential_flow, -power_ratings, power_ratings)
+
+            potential_soc = soc_prev + potential_flow * timestep / energy_ratings
+            soc_prev = np.clip(potential_soc, 0, 1)
+            soc[timestep_index] = soc_prev
+
+    # The flow is the change of the SOC, as average power over each timestep
+    flow = np.diff(soc, axis=0, prepend=0) * (energy_ratings / timestep).astype(dtype)
+
+    # Calculate the curtailed and unserved energy that remains after the battery (dis)charged
+    curtailed, unserved = balance.calculate(surplus, demand=0, battery_flow=flow)
+
+    return Simulation(
+        soc=soc,
+        flow=flow,
+        curtailed=curtailed.sum(axis=0) * timestep,
+        unserved=unserved.sum(axis=0) * timestep,
+    )
+
+
+def get_grid_flow(flow, efficiency):
+    """
+    Convert the change of the stored energy to the power that the battery exchanges with the grid,
+    since the losses are taken when charging.
+
+    Returns:
+        ndarray: Power (MW) that the battery takes from the grid, which is negative when it supplies the grid
+    """
+    flow = np.asarray(flow)
+    return np.where(flow > 0, flow / efficiency, flow)
@@ -0,0 +1,272 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+import balance
+import battery
+import cache
+import finance
+import knmi
+import model
+import pv
+import timeseries
+import wind
+
+# The sizes of the synthetic weather data, as the number of years and the timestep
+sizes = {
+    "1y": {"years": 1, "frequency": "60min"},
+    "10y": {"years": 10, "frequency": "60min"},
+    "1y_15min": {"years": 1, "frequency": "15min"},
+    "1y_1min": {"years": 1, "frequency": "1min"},
+}
+
+# The ENTSO-E export that is aligned to the synthetic weather, if it is available
+prices_filename = "input/day_ahead_prices.csv"
+
+
+def create_weather(years, frequency, *, seed=0):
+    """
+    Create synthetic weather data with a daily and seasonal pattern.
+
+    Returns:
+        DataFrame: DataFrame with the same columns as the KNMI data
+    """
+    # Use timestamps in the middle of each timestep, like the KNMI data
+    start = pd.Timestamp("2000-01-01")
+    step = pd.Timedelta(frequency)
+    end = start + pd.DateOffset(years=years)
+    index = pd.date_range(
+        start + step / 2, periods=(end - start) // step, freq=frequency, name="datetime"
+    )
+    random = np.random.default_rng(seed)
+    hour = index.hour + index.minute / 60
+    day = index.dayofyear
+
+    daylight = np.clip(np.sin(np.pi * (hour - 5) / 14), 0, None)
+    season = 1 + 0.5 * np.sin(2 * np.pi * (day - 80) / 365)
+    # The global horizontal irradiance (W/m2) peaks at about 900 W/m2 in summer
+    ghi = daylight * season * 600 * random.uniform(0.3, 1, len(index))
+    weather = pd.DataFrame(
+        {
+            "wind_direction": random.integers(10, 361, len(index)).astype(float),
+            "wind_speed": np.abs(random.normal(6, 3, len(index))).round(1),
+            "temperature": (10 + 8 * np.sin(2 * np.pi * (day - 110) / 365)).round(1),
+            "ghi": ghi,
+            "air_pressure": np.full(len(index), 1.013),
+        },
+        index=index,
+    )
+    return weather
+
+
+def write_knmi_file(weather, filename):
+    """
+    Write hourly weather data in the format of a KNMI hourly data file.
+    """
+    date = weather.index - pd.Timedelta(minutes=30)
+    knmi_data = pd.DataFrame(
+        {
+            "# STN": 344,
+            "YYYYMMDD": date.strftime("%Y%m%d"),
+            "HH": date.hour + 1,
+            "DD": weather.wind_direction.astype(int),
+            "FH": (weather.wind_speed * 10).round().astype(int),
+            "T": (weather.temperature * 10).round().astype(int),
+            "P": (weather.air_pressure * 10 ** 4).round().astype(int),
+            "Q": (weather.ghi * 60 * 60 / 100 ** 2).round().astype(int),
+        }
+    )
+    with open(filename, "w") as file:
+        file.write("# BRON: synthetic weather data for benchmarks\n#\n")
+        file.write("# STN         LON(east)   LAT(north)     ALT(m)  NAME\n")
+        file.write("# 344:         4.447       51.962      -4.30  SYNTHETIC\n#\n")
+        knmi_data.to_csv(file, index=False)
+
+
+def _reset_caches(directory):
+    # Clear the in-memory caches and use an empty cache directory, so every run starts cold
+    cache.clear_memos()
+    cache.directory = tempfile.mkdtemp(dir=directory)
+
+
+def _measure(function, repeat, directory):
+    # Time the function without tracing, since tracemalloc slows down the allocations
+    durations = []
+    for _ in range(repeat):
+        _reset_caches(directory)
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+
+    # Measure the peak memory in a separate run
+    _reset_caches(directory)
+    tracemalloc.start()
+    function()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(durations), peak_memory
+
+
+def _get_stages(weather, filename, parameters):
+    # The PV stages would only time a trivial workload if the weather gave no production
+    production_pv = pv.calculate(weather, parameters)
+    assert production_pv.sum() > 0, "The synthetic weather gives no PV production"
+    production = wind.calculate(weather, parameters) + production_pv
+    demand = production.mean() * (1 + 0.3 * np.sin(np.arange(len(weather)) / 24))
+    prices = pd.Series(np.full(len(weather), 50.0), index=weather.index)
+    surplus = production - demand
+    timestep = timeseries.get_timestep(weather.index)
+    flow = battery.simulate(surplus, 5, 5, 0.9, timestep=timestep).flow[:, 0]
+
+    def calculate_financials():
+        revenue = (prices * production).sum() * timestep
+        investment = parameters["financial"]["investment"] * 10 ** 6
+        finance.calculate_payback_period(investment, revenue)
+        finance.calculate_lcoe(
+            investment,
+            production.sum() * timestep,
+            discount_rate=parameters["financial"]["discount_rate"],
+            deprecation_period=parameters["financial"]["deprecation_period"],
+        )
+
+    # A farm of 200 turbines with wake losses
+    layout = wind.get_layout(200, rotor_diameter=parameters["wind"]["rotor_diameter"])
+    parameters_farm = {"wind": {**parameters["wind"], "layout": layout}}
+
+    stages = {
+        "wind.calculate": lambda: wind.calculate(weather, parameters),
+        "wind.calculate (200 turbine farm)": lambda: wind.calculate(
+            weather, parameters_farm
+        ),
+        "pv.calculate": lambda: pv.calculate(weather, parameters),
+        "balance.calculate": lambda: balance.calculate(production, demand),
+        "balance.calculate (storage)": lambda: balance.calculate(
+            production, demand, flow
+        ),
+        "battery.simulate": lambda: battery.simulate(
+            surplus, 5, 5, 0.9, timestep=timestep
+        ),
+        "finance": calculate_financials,
+    }
+    if os.path.exists(prices_filename):
+        stages["timeseries.import_day_ahead_prices"] = lambda: (
+            timeseries.import_day_ahead_prices(prices_filename, weather.index)
+        )
+    if filename is not None:
+        years = weather.index.year.unique()
+        stages["knmi.import_data"] = lambda: [
+            knmi.import_data(filename, year) for year in years
+        ]
+    return stages
+
+
+def _run_size(name, parameters, repeat, directory):
+    results = []
+    weather = create_weather(**sizes[name])
+    _reset_caches(directory)
+
+    # The KNMI files only contain hourly data
+    filename = None
+    if sizes[name]["frequency"] == "60min":
+        filename = os.path.join(directory, f"weather_{name}.csv")
+        write_knmi_file(weather, filename)
+
+    for stage, function in _get_stages(weather, filename, parameters).items():
+        seconds, peak_memory = _measure(function, repeat, directory)
+        results.append(
+            {
+                "stage": stage,
+                "size": name,
+                "rows": len(weather),
+                "seconds": seconds,
+                "peak_memory": peak_memory,
+            }
+        )
+        print(
+            f"{stage:35} {name:10} {seconds:9.4f}s {peak_memory / 10 ** 6:9.1f}MB",
+            file=sys.stderr,
+        )
+    return results
+
+
+def run(names, *, repeat=3):
+    """
+    Run the benchmarks for the given sizes, with the caches cleared before every run.
+
+    Returns:
+        dict: Dictionary with information about the environment and the results of each benchmark
+    """
+    parameters = model.default_parameters()
+    results = []
+    cache_directory = cache.directory
+
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            for name in names:
+                results += _run_size(name, parameters, repeat, directory)
+        finally:
+            cache.directory = cache_directory
+
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "results": results,
+    }
+
+
+def compare(results, baseline, *, tolerance):
+    """
+    Compare the results with a baseline.
+
+    Returns:
+        list: The benchmarks that are more than the tolerance slower than the baseline
+    """
+    baseline = {
+        (result["stage"], result["size"]): result for result in baseline["results"]
+    }
+    regressions = []
+    for result in results["results"]:
+        reference = baseline.get((result["stage"], result["size"]))
+        if reference is None:
+            continue
+
+        ratio = result["seconds"] / reference["seconds"]
+        memory_ratio = result["peak_memory"] / max(reference["peak_memory"], 1)
+        print(
+            f"{result['stage']:35} {result['size']:10} {ratio:6.2f}x time {memory_ratio:6.2f}x memory"
+        )
+        if ratio > 1 + tolerance or memory_ratio > 1 + tolerance:
+            regressions.append(result)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark every stage of the model")
+    parser.add_argument("--sizes", nargs="+", choices=sizes.keys(), default=list(sizes))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="path of the JSON file the results are written to")
+    parser.add_argument("--compare", help="path of a JSON file with baseline results")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="allowed relative slowdown"
+    )
+    args = parser.parse_args()
+
+    results = run(args.sizes, repeat=args.repeat)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), tolerance=args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} benchmarks regressed", file=sys.stderr)
+            sys.exit(1)
@@ -0,0 +1,317 @@
+import collections
+import contextlib
+import functools
+import hashlib
+import os
+import threading
+import weakref
+import numpy as np
+import pandas as pd
+
+directory = "cache"
+
+# Number of bytes of the cache files that are kept in the cache directory, the least recently used
+# files are removed first
+max_bytes = 2 * 2 ** 30
+
+# The statistics of all caches, so they can be collected in one place
+_statistics = {}
+
+# All memoized functions, so their caches can be cleared at once
+_memos = []
+
+# Fingerprints of the frozen pandas objects and arrays by their id, which are removed when the
+# object is deleted
+_frozen = {}
+
+# Number of rows of a frozen Series or DataFrame that are compared to detect a change in place
+_sample_size = 64
+
+
+def get_path(filename):
+    """
+    Get the path of a file in the cache directory and create the directory if it does not exist yet.
+
+    Returns:
+        str: Path of the file
+    """
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, filename)
+
+
+def _evict():
+    # Remove the least recently used cache files until the directory fits in max_bytes, the files
+    # that are removed or replaced by another process in the meantime are skipped
+    files = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.endswith(".npz"):
+                try:
+                    status = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((status.st_mtime_ns, status.st_size, entry.path))
+    size = sum(file_size for _, file_size, _ in files)
+    for _, file_size, path in sorted(files):
+        if size <= max_bytes:
+            break
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path)
+        size -= file_size
+
+
+def persist(name, key, calculate):
+    """
+    Load a dictionary of arrays from the cache directory, or calculate and store it if there is no
+    cache file for this key yet. The file is written atomically, so other processes never read a
+    partially written file. The least recently used files are removed once the cache directory
+    is larger than max_bytes.
+
+    Returns:
+        dict: Dictionary with the arrays
+    """
+    filename = get_path(f"{name}_{key}.npz")
+    try:
+        with np.load(filename) as arrays:
+            arrays = dict(arrays)
+
+        # Mark the file as recently used, the file might have been removed in the meantime
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(filename)
+        return arrays
+    except FileNotFoundError:
+        pass
+
+    arrays = calculate()
+    temporary_filename = f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporary_filename, "wb") as file:
+        np.savez(file, **arrays)
+    os.replace(temporary_filename, filename)
+    _evict()
+    return arrays
+
+
+class FrozenDict(dict):
+    """
+    Dictionary that cannot be changed and has a precomputed fingerprint. All nested dictionaries,
+    pandas objects, and arrays are frozen as well.
+    """
+
+    def __init__(self, values=(), *, key=None):
+        super().__init__((name, freeze(value)) for name, value in dict(values).items())
+        self.fingerprint = key or fingerprint(dict(self))
+
+    def _raise_immutable(self, *args, **kwargs):
+        raise TypeError("A frozen dictionary cannot be changed")
+
+    __setitem__ = __delitem__ = __ior__ = _raise_immutable
+    clear = pop = popitem = setdefault = update = _raise_immutable
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+
+def _get_signature(value):
+    # Summarize a Series or DataFrame by its shape and a sample of its rows, so most changes in
+    # place are noticed without hashing all of its content. Frozen arrays are read-only and
+    # indexes cannot be changed, so they do not need a signature.
+    if not isinstance(value, (pd.Series, pd.DataFrame)):
+        return None
+    positions = np.unique(np.linspace(0, max(len(value) - 1, 0), _sample_size).astype(int))
+    sample = value.take(positions[: len(value)]).to_numpy()
+    columns = list(value.columns) if isinstance(value, pd.DataFrame) else value.name
+    return value.shape, columns, _array_to_bytes(sample)
+
+
+def _get_frozen(value):
+    frozen = _frozen.get(id(value))
+    if frozen is None or frozen[0]() is not value:
+        return None
+
+    # Forget the fingerprint of a pandas object that was changed after it was frozen, so its
+    # content is hashed again
+    reference, key, signature = frozen
+    if _get_signature(value) != signature:
+        _frozen.pop(id(value), None)
+        return None
+    return key
+
+
+def freeze(value, *, key=None):
+    """
+    Precompute the fingerprint of a value, so it can be used as cache key without hashing its
+    content again. Dictionaries are converted to a FrozenDict, and arrays are copied to a read-only
+    array unless they are read-only already, so the arrays of the caller are not changed. Pandas
+    objects are frozen in place and should not be changed afterwards. If the shape or a sample of
+    the rows of a frozen Series or DataFrame changes anyway, its content is hashed again. The key
+    can be used instead of the fingerprint of the content, for example when the value is read from
+    a file with a known fingerprint.
+
+    Returns:
+        object: The frozen value
+    """
+    if isinstance(value, FrozenDict):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict(value, key=key)
+    if isinstance(value, np.ndarray) and value.flags.writeable:
+        value = value.copy()
+        value.flags.writeable = False
+    if isinstance(value, (pd.Index, pd.Series, pd.DataFrame, np.ndarray)):
+        if _get_frozen(value) is None:
+            identifier = id(value)
+            reference = weakref.ref(value, lambda _: _frozen.pop(identifier, None))
+            _frozen[identifier] = (reference, key or fingerprint(value), _get_signature(value))
+    return value
+
+
+def select(frame, columns):
+    """
+    Select columns of a DataFrame. The selection of a frozen DataFrame is frozen as well, with a
+    fingerprint that is derived from the fingerprint of the DataFrame instead of its content.
+
+    Returns:
+        DataFrame: DataFrame or Series with the selected columns
+    """
+    selection = frame[columns]
+    key = _get_frozen(frame)
+    if key is not None:
+        freeze(selection, key=fingerprint(key, columns))
+    return selection
+
+
+def _frame(tag, payload):
+    # Prefix every value with its type and length, so concatenated values cannot be confused
+    return tag + len(payload).to_bytes(8, "little") + payload
+
+
+def _array_to_bytes(values):
+    # Object arrays contain pointers, so their items are converted one by one
+    if values.dtype == object:
+        content = _to_bytes(values.ravel().tolist())
+    else:
+        content = np.ascontiguousarray(values).tobytes()
+    header = f"{values.dtype.str}{values.shape}".encode()
+    return _frame(b"A", _frame(b"H", header) + _frame(b"D", content))
+
+
+def _to_bytes(value):
+    key = _get_frozen(value)
+    if key is not None:
+        return _frame(b"K", key.encode())
+    if isinstance(value, FrozenDict):
+        return _frame(b"K", value.fingerprint.encode())
+    if isinstance(value, pd.DatetimeIndex):
+        return _frame(b"T", _array_to_bytes(np.asarray(value, dtype="datetime64[ns]")))
+    if isinstance(value, pd.Index):
+        return _frame(b"I", _array_to_bytes(np.asarray(value)))
+    if isinstance(value, pd.Series):
+        return _frame(b"S", _to_bytes(value.index) + _array_to_bytes(value.to_numpy()))
+    if isinstance(value, pd.DataFrame):
+        columns = [
+            _to_bytes(str(column)) + _array_to_bytes(value[column].to_numpy())
+            for column in value
+        ]
+        return _frame(b"F", _to_bytes(value.index) + b"".join(columns))
+    if isinstance(value, np.ndarray):
+        return _array_to_bytes(value)
+    if isinstance(value, dict):
+        items = [_to_bytes(key) + _to_bytes(value[key]) for key in sorted(value)]
+        return _frame(b"M", b"".join(items))
+    if isinstance(value, (list, tuple)):
+        return _frame(b"L", b"".join(_to_bytes(item) for item in value))
+    return _frame(b"R", repr(value).encode())
+
+
+def fingerprint(*values):
+    """
+    Create a short fingerprint of pandas objects, arrays, and plain values.
+
+    Returns:
+        str: Hexadecimal digest that only changes when one of the values changes
+    """
+    digest = hashlib.sha1()
+    for value in values:
+        digest.update(_to_bytes(value))
+    return digest.hexdigest()
+
+
+def fingerprint_file(filename):
+    """
+    Create a fingerprint of the content of a file.
+
+    Returns:
+        str: Hexadecimal digest that only changes when the content of the file changes
+    """
+    digest = hashlib.sha1()
+    with open(filename, "rb") as file:
+        for block in iter(lambda: file.read(2 ** 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def memo(maxsize=16):
+    """
+    Memoize a function in a bounded LRU cache, which uses the fingerprint of the arguments as key.
+
+    The cached results are shared between callers and should not be mutated. The number of hits,
+    misses, and evictions is available from get_statistics. Frozen arguments are not hashed again,
+    so a lookup with frozen arguments only takes microseconds.
+    """
+
+    def decorator(function):
+        results = collections.OrderedDict()
+        lock = threading.Lock()
+        statistics = {"hits": 0, "misses": 0, "evictions": 0}
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            key = fingerprint(args, kwargs)
+            with lock:
+                if key in results:
+                    statistics["hits"] += 1
+                    results.move_to_end(key)
+                    return results[key]
+                statistics["misses"] += 1
+
+            result = function(*args, **kwargs)
+            with lock:
+                results[key] = result
+                if len(results) > maxsize:
+                    results.popitem(last=False)
+                    statistics["evictions"] += 1
+            return result
+
+        wrapper.cache_clear = results.clear
+        wrapper.cache_info = lambda: {**statistics, "size": len(results), "maxsize": maxsize}
+        register(f"{function.__module__}.{function.__qualname__}", wrapper.cache_info)
+        _memos.append(wrapper)
+        return wrapper
+
+    return decorator
+
+
+def clear_memos():
+    """
+    Clear the results of all memoized functions, for example to measure a cold run.
+    """
+    for wrapper in _memos:
+        wrapper.cache_clear()
+
+
+def register(name, get_info):
+    """
+    Register a function that returns the statistics of a cache, so they are included in
+    get_statistics.
+    """
+    _statistics[name] = get_info
+
+
+def get_statistics():
+    """
+    Get the number of hits, misses, and evictions of every cache.
+
+    Returns:
+        dict: Dictionary with the statistics of each cache
+    """
+    return {name: get_info() for name, get_info in _statistics.items()}
@@ -0,0 +1,86 @@
+import argparse
+import json
+import os
+import pandas as pd
+import knmi
+import model
+import timeseries
+
+
+def load_scenarios(filename):
+    """
+    Load a list of scenarios from a JSON or YAML file, which contains either a list or a dictionary
+    with a list of scenarios under "scenarios".
+
+    Returns:
+        list: List with the scenarios
+    """
+    with open(filename) as file:
+        if filename.endswith((".yaml", ".yml")):
+            # PyYAML is only required for YAML scenario files
+            import yaml
+
+            scenarios = yaml.safe_load(file)
+        else:
+            scenarios = json.load(file)
+
+    # Allow both a list of scenarios and a dictionary with a list of scenarios
+    if isinstance(scenarios, dict):
+        scenarios = scenarios["scenarios"]
+    return scenarios
+
+
+def run(scenarios, *, hourly_directory=None):
+    """
+    Run the model for each scenario.
+
+    Returns:
+        DataFrame: DataFrame with the summarized results of each scenario
+    """
+    weather = {}
+    summaries = []
+
+    for number, scenario in enumerate(scenarios):
+        name = scenario.get("name", f"scenario_{number + 1}")
+        filename = scenario.get("weather", "input/weather.csv")
+        year = scenario.get("year", 2018)
+        timestep = scenario.get("timestep")
+
+        # Only import the weather data once for each file, year, and timestep
+        if (filename, year, timestep) not in weather:
+            scenario_weather = knmi.import_data(filename, year)
+            if timestep is not None:
+                scenario_weather = timeseries.resample_weather(scenario_weather, timestep)
+            weather[(filename, year, timestep)] = scenario_weather
+
+        parameters = model.create_parameters(scenario)
+        results = model.run(weather[(filename, year, timestep)], parameters)
+        summaries.append({"name": name, **results.summarize()})
+
+        if hourly_directory:
+            os.makedirs(hourly_directory, exist_ok=True)
+            results.data.to_csv(os.path.join(hourly_directory, f"{name}.csv"))
+
+    return pd.DataFrame(summaries).set_index("name")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run the hybrid park model for the scenarios in a JSON or YAML file"
+    )
+    parser.add_argument("scenarios", help="path of the JSON or YAML scenario file")
+    parser.add_argument(
+        "--output", help="path of the CSV or JSON file the results are written to"
+    )
+    parser.add_argument(
+        "--hourly", help="directory the hourly results of each scenario are written to"
+    )
+    args = parser.parse_args()
+
+    results = run(load_scenarios(args.scenarios), hourly_directory=args.hourly)
+    if args.output is None:
+        print(results.to_string())
+    elif args.output.endswith(".json"):
+        results.to_json(args.output, orient="index", indent=2)
+    else:
+        results.to_csv(args.output)
@@ -1,4 +1,7 @@
+import json
+import pandas as pd
 import streamlit as st
+import cache
 
 
 def initialize():
@@ -18,3 +21,25 @@ def initialize():
         The source code for the model can be found on [Github](https://github.com/RubenVanEldik/ect2-bonus-project).
         """
     )
+
+
+def show_profiler(recorder):
+    st.sidebar.title("⏱️ Profiler")
+    if not st.sidebar.checkbox("Show the duration of each stage"):
+        return
+
+    # Show the recorded spans and the statistics of the memoized functions
+    spans = recorder.to_frame()
+    st.sidebar.caption(
+        f"The last run took {round(spans[spans.category != 'stage'].duration.sum(), 3)}s"
+    )
+    st.sidebar.dataframe(spans.round({"start": 4, "duration": 4}))
+    st.sidebar.dataframe(pd.DataFrame(cache.get_statistics()).T)
+
+    # Export the spans, so they can be opened in chrome://tracing or Perfetto
+    st.sidebar.download_button(
+        "Download Chrome trace",
+        json.dumps(recorder.to_chrome_trace()),
+        file_name="trace.json",
+        mime="application/json",
+    )
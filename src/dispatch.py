@@ -0,0 +1,129 @@
+import functools
+import numpy as np
+import scipy.optimize
+import scipy.sparse
+import balance
+import battery
+
+modes = ["greedy", "rolling", "perfect_foresight"]
+
+# Value of lost load (€/MWh), which is higher than any day ahead price so serving demand comes first
+default_unserved_penalty = 3000
+
+
+@functools.lru_cache(maxsize=8)
+def _get_constraints(num_timesteps, timestep, efficiency):
+    # The variables are the charge power, discharge power, stored energy, and unserved power
+    identity = scipy.sparse.identity(num_timesteps, format="csr")
+    previous = scipy.sparse.eye(num_timesteps, k=-1, format="csr")
+    zeros = scipy.sparse.csr_matrix((num_timesteps, num_timesteps))
+
+    # The stored energy changes with the (dis)charged energy, the losses are taken when charging
+    # like in the greedy simulation
+    a_eq = scipy.sparse.hstack(
+        [
+            -efficiency * timestep * identity,
+            timestep * identity,
+            identity - previous,
+            zeros,
+        ],
+        format="csr",
+    )
+
+    # The unserved power is at least the demand minus the production and the battery flow
+    a_ub = scipy.sparse.hstack([identity, -identity, zeros, -identity], format="csr")
+    return a_eq, a_ub
+
+
+def _solve(surplus, prices, soc, *, power_rating, energy_rating, efficiency, timestep, penalty):
+    num_timesteps = len(surplus)
+    a_eq, a_ub = _get_constraints(num_timesteps, timestep, efficiency)
+
+    # Only the costs and the right hand sides change between windows
+    costs = timestep * np.concatenate(
+        [prices, -prices, np.zeros(num_timesteps), np.full(num_timesteps, penalty)]
+    )
+    b_eq = np.zeros(num_timesteps)
+    b_eq[0] = soc * energy_rating
+    # The power rating limits the flow into and out of the battery, after the losses
+    bounds = (
+        [(0, power_rating / efficiency)] * num_timesteps
+        + [(0, power_rating)] * num_timesteps
+        + [(0, energy_rating)] * num_timesteps
+        + [(0, None)] * num_timesteps
+    )
+
+    result = scipy.optimize.linprog(
+        costs, A_ub=a_ub, b_ub=surplus, A_eq=a_eq, b_eq=b_eq, bounds=bounds, method="highs"
+    )
+    if result.status != 0:
+        raise RuntimeError(f"The battery dispatch could not be optimized: {result.message}")
+
+    # Return the change of the stored energy as flow, like the greedy simulation
+    charge, discharge, energy, _ = np.split(result.x, 4)
+    return energy / energy_rating, efficiency * charge - discharge
+
+
+def optimize(
+    surplus,
+    prices,
+    *,
+    power_rating,
+    energy_rating,
+    efficiency,
+    timestep=1,
+    window=48,
+    step=24,
+    unserved_penalty=default_unserved_penalty,
+):
+    """
+    Dispatch a battery with a linear program that minimizes the cost of unserved energy and
+    maximizes the revenue of (dis)charging at the day ahead prices.
+
+    The battery is the same as in the greedy simulation: the efficiency is applied when charging,
+    the power rating limits the change of the stored energy, and the flow is the change of the
+    stored energy as average power over each timestep.
+
+    The year is solved in rolling windows of the given number of hours, of which only the first
+    step hours are kept before the window moves on with the SOC at the end of that step. Every full
+    window has the same sparse constraint matrices, so they are only built once. Without a window
+    the full year is solved at once with perfect foresight.
+
+    Returns:
+        Simulation: SOC and flow (MW) matrices with a single configuration and the total curtailed and unserved energy (MWh)
+    """
+    surplus = np.asarray(surplus, dtype=float)
+    prices = np.nan_to_num(np.asarray(prices, dtype=float))
+    num_timesteps = len(surplus)
+    soc = np.empty(num_timesteps)
+    flow = np.empty(num_timesteps)
+    options = dict(
+        power_rating=float(power_rating),
+        energy_rating=float(energy_rating),
+        efficiency=float(efficiency),
+        timestep=float(timestep),
+        penalty=unserved_penalty,
+    )
+
+    window_length = num_timesteps if window is None else round(window / timestep)
+    step_length = window_length if window is None else round(step / timestep)
+    soc_initial = 0.0
+    for start in range(0, num_timesteps, step_length):
+        end = min(start + window_length, num_timesteps)
+        window_soc, window_flow = _solve(
+            surplus[start:end], prices[start:end], soc_initial, **options
+        )
+
+        # Only keep the first step of the window
+        length = min(step_length, end - start)
+        soc[start : start + length] = window_soc[:length]
+        flow[start : start + length] = window_flow[:length]
+        soc_initial = window_soc[length - 1]
+
+    curtailed, unserved = balance.calculate(surplus, demand=0, battery_flow=flow)
+    return battery.Simulation(
+        soc=soc[:, np.newaxis],
+        flow=flow[:, np.newaxis],
+        curtailed=np.atleast_1d(curtailed.sum() * timestep),
+        unserved=np.atleast_1d(unserved.sum() * timestep),
+    )
@@ -0,0 +1,297 @@
+import argparse
+import concurrent.futures
+import numpy as np
+import pandas as pd
+import battery
+import finance
+import knmi
+import model
+import pv
+import timeseries
+import wind
+
+metrics = [
+    "production",
+    "curtailed",
+    "unserved",
+    "curtailed_w_storage",
+    "unserved_w_storage",
+    "revenue",
+    "payback_period",
+    "lcoe",
+]
+
+# For these metrics a higher value is better, so their P90 is exceeded by 90% of the members
+_higher_is_better = ["production", "revenue"]
+
+# The context is set once per worker process, so the profiles are not pickled for every task
+_context = {}
+
+
+def _check_days(index, steps_per_day):
+    # The rows are split into days by position, so the index should consist of whole days that
+    # follow each other without gaps
+    step = pd.Timedelta(days=1) / steps_per_day
+    first = index[0] - step / 2
+    if len(index) % steps_per_day or first != first.normalize():
+        raise ValueError("The data should start at midnight and consist of whole days")
+    gaps = np.flatnonzero(np.diff(index.to_numpy()) != step.to_timedelta64())
+    if len(gaps):
+        raise ValueError(f"The data has a gap after {index[gaps[0]]}")
+
+
+def _to_days(values, steps_per_day):
+    return np.asarray(values, dtype=float).reshape(-1, steps_per_day)
+
+
+def _match_days(values, days, steps_per_day):
+    # Select the day of the profile with the same calendar date as each day of the weather, the
+    # first day is used if the profile contains a calendar date twice
+    _check_days(values.index, steps_per_day)
+    profile_days = timeseries.get_calendar_days(values.index[::steps_per_day])
+    calendar, first = np.unique(profile_days, return_index=True)
+    missing = np.setdiff1d(days, calendar)
+    if len(missing):
+        raise ValueError(f"The profile does not cover the days of the year {missing + 1}")
+    positions = np.full(365, -1)
+    positions[calendar] = first
+    return _to_days(values, steps_per_day)[positions[days]]
+
+
+def get_profiles(weather, demand, prices, parameters):
+    """
+    Calculate the per-unit profiles of the historical weather, which are shared by all members.
+
+    The weather data can contain multiple years, while the demand and day ahead prices are series
+    for a single year and are matched to the weather by calendar date. In leap years February 29
+    uses the demand and price of February 28.
+
+    Returns:
+        dict: Dictionary with the wind, PV, demand, and price of each day (days x timesteps) and the calendar day of the year of each day
+    """
+    timestep = timeseries.get_timestep(weather.index)
+    steps_per_day = round(24 / timestep)
+    _check_days(weather.index, steps_per_day)
+
+    # Calculate the production of a single turbine and a single panel
+    profile_wind = wind.calculate(
+        weather, {"wind": {**parameters["wind"], "num_turbines": 1}}
+    )
+    profile_pv = pv.calculate(
+        weather,
+        {"location": parameters["location"], "pv": {**parameters["pv"], "num_panels": 1}},
+    )
+
+    # Use the demand and price of the same calendar date as the weather
+    day_of_year = timeseries.get_calendar_days(weather.index[::steps_per_day])
+    return {
+        "wind": _to_days(profile_wind, steps_per_day),
+        "pv": _to_days(profile_pv, steps_per_day),
+        "demand": _match_days(demand, day_of_year, steps_per_day),
+        "prices": _match_days(prices, day_of_year, steps_per_day),
+        "day_of_year": day_of_year,
+        "timestep": timestep,
+    }
+
+
+def _get_candidates(day_of_year, *, num_days, block_length, window):
+    # Find the historical days that can start a block for each day of the synthetic year
+    starts = np.arange(len(day_of_year) - block_length + 1)
+    distance = np.abs(day_of_year[starts, np.newaxis] - np.arange(num_days))
+    distance = np.minimum(distance, 365 - distance)
+    candidates = [starts[distance[:, day] <= window] for day in range(num_days)]
+
+    # Every block needs at least one historical block to start from
+    for day in range(0, num_days, block_length):
+        if len(candidates[day]) == 0:
+            raise ValueError(
+                f"No historical block of {block_length} days starts within {window} days of "
+                f"day {day + 1}, use a wider window or more years of weather data"
+            )
+    return candidates
+
+
+def _sample(random, candidates, *, num_days, block_length):
+    # Build a synthetic year from blocks of consecutive historical days of the same season
+    days = np.empty(num_days, dtype=int)
+    for start in range(0, num_days, block_length):
+        length = min(block_length, num_days - start)
+        days[start : start + length] = random.choice(candidates[start]) + np.arange(length)
+    return days
+
+
+def _initialize(profiles, parameters, num_days, block_length, candidates):
+    _context.update(
+        profiles=profiles,
+        parameters=parameters,
+        num_days=num_days,
+        block_length=block_length,
+        candidates=candidates,
+    )
+
+
+def _simulate(seed, num_members):
+    profiles = _context["profiles"]
+    parameters = _context["parameters"]
+    timestep = profiles["timestep"]
+    random = np.random.default_rng(seed)
+
+    # Sample the days of each member, the columns of the matrices are the members
+    days = np.stack(
+        [
+            _sample(
+                random,
+                _context["candidates"],
+                num_days=_context["num_days"],
+                block_length=_context["block_length"],
+            )
+            for _ in range(num_members)
+        ],
+        axis=1,
+    )
+
+    def to_member_matrix(name):
+        return profiles[name][days].transpose(0, 2, 1).reshape(-1, num_members)
+
+    production = parameters["wind"]["num_turbines"] * to_member_matrix("wind")
+    production += parameters["pv"]["num_panels"] * to_member_matrix("pv")
+    demand = to_member_matrix("demand")
+    prices = to_member_matrix("prices")
+
+    # Simulate the battery of all members at once
+    surplus = production - demand
+    simulation = battery.simulate(
+        surplus,
+        power_ratings=parameters["storage"]["power_rating"],
+        energy_ratings=parameters["storage"]["energy_rating"],
+        efficiencies=parameters["storage"]["efficiency"],
+        timestep=timestep,
+        dtype=np.float32,
+    )
+
+    # Calculate the financial metrics of each member
+    investment = parameters["financial"]["investment"] * 10 ** 6
+    annual_production = production.sum(axis=0) * timestep
+    grid_flow = battery.get_grid_flow(
+        simulation.flow, parameters["storage"]["efficiency"]
+    )
+    annual_revenue = np.nansum(prices * (production - grid_flow), axis=0) * timestep
+    return np.column_stack(
+        [
+            annual_production,
+            np.maximum(surplus, 0).sum(axis=0) * timestep,
+            np.maximum(-surplus, 0).sum(axis=0) * timestep,
+            simulation.curtailed,
+            simulation.unserved,
+            annual_revenue,
+            finance.calculate_payback_period(investment, annual_revenue),
+            finance.calculate_lcoe(
+                investment,
+                annual_production,
+                discount_rate=parameters["financial"]["discount_rate"],
+                deprecation_period=parameters["financial"]["deprecation_period"],
+            ),
+        ]
+    )
+
+
+def run(
+    profiles,
+    parameters,
+    *,
+    num_members=1000,
+    num_days=365,
+    block_length=5,
+    window=15,
+    batch_size=100,
+    seed=0,
+    max_workers=None,
+):
+    """
+    Run the production, storage, and finance chain for an ensemble of synthetic years.
+
+    Every member is built from blocks of consecutive historical days, which start within the
+    window (days) around the same day of the year, so the seasons and the correlation between
+    weather, demand, and prices within a day are preserved. The members are simulated in batches
+    on a pool of worker processes, and the results do not depend on the number of workers.
+
+    Returns:
+        DataFrame: DataFrame with the annual metrics of each member
+    """
+    seeds = np.random.SeedSequence(seed).spawn(-(-num_members // batch_size))
+    sizes = [
+        min(batch_size, num_members - batch * batch_size) for batch in range(len(seeds))
+    ]
+
+    # Find the candidates before starting the workers, so an error is raised in this process
+    candidates = _get_candidates(
+        profiles["day_of_year"],
+        num_days=num_days,
+        block_length=block_length,
+        window=window,
+    )
+    initargs = (profiles, parameters, num_days, block_length, candidates)
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers, initializer=_initialize, initargs=initargs
+    ) as executor:
+        results = list(executor.map(_simulate, seeds, sizes))
+
+    members = pd.DataFrame(np.concatenate(results), columns=metrics)
+    members.index.name = "member"
+    return members
+
+
+def summarize(members):
+    """
+    Get the P50 and P90 of each metric of the ensemble. The P90 is the value that 90% of the
+    members reach, which is the 10th percentile of the production and revenue and the 90th
+    percentile of the other metrics.
+
+    Returns:
+        DataFrame: DataFrame with the P50 and P90 of each metric
+    """
+    p90 = {
+        metric: members[metric].quantile(0.1 if metric in _higher_is_better else 0.9)
+        for metric in members
+    }
+    return pd.DataFrame({"P50": members.median(), "P90": pd.Series(p90)})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run the model for an ensemble of resampled weather years"
+    )
+    parser.add_argument("--weather", default="input/weather.csv")
+    parser.add_argument("--years", type=int, nargs="+", default=[2018])
+    parser.add_argument("--demand-year", type=int, default=2018)
+    parser.add_argument("--members", type=int, default=1000)
+    parser.add_argument("--block-length", type=int, default=5)
+    parser.add_argument("--window", type=int, default=15)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--output", help="path of the CSV file the members are written to")
+    args = parser.parse_args()
+
+    # The demand and day ahead prices are only available for a single year
+    parameters = model.default_parameters()
+    weather = pd.concat([knmi.import_data(args.weather, year) for year in args.years])
+    index = knmi.import_data(args.weather, args.demand_year).index
+    profiles = get_profiles(
+        weather,
+        timeseries.import_demand("input/demand.csv", index),
+        timeseries.import_day_ahead_prices("input/day_ahead_prices.csv", index),
+        parameters,
+    )
+
+    members = run(
+        profiles,
+        parameters,
+        num_members=args.members,
+        block_length=args.block_length,
+        window=args.window,
+        seed=args.seed,
+        max_workers=args.workers,
+    )
+    if args.output:
+        members.to_csv(args.output)
+    print(summarize(members).to_string())
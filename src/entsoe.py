@@ -0,0 +1,102 @@
+import os
+import numpy as np
+import pandas as pd
+import cache
+
+# Increase the version when the parser changes, so old cache files are no longer used
+version = 1
+
+# Time zone of the exports of which the times are in CET/CEST
+timezone = "Europe/Amsterdam"
+
+# Every time period is written as "01.01.2018 00:00 - 01.01.2018 01:00"
+_separators = {2: ".", 5: ".", 10: " ", 13: ":", 16: " ", 17: "-", 18: " "}
+_period_length = 35
+
+
+def _to_number(codes, start, length):
+    digits = codes[:, start : start + length] - ord("0")
+    return digits @ 10 ** np.arange(length - 1, -1, -1)
+
+
+def _get_datetimes(codes, offset):
+    # Build the timestamps from the digits at fixed positions, without parsing every string
+    year = (_to_number(codes, offset + 6, 4) - 1970).astype("datetime64[Y]")
+    month = year.astype("datetime64[M]") + (_to_number(codes, offset + 3, 2) - 1)
+    day = month.astype("datetime64[D]") + (_to_number(codes, offset, 2) - 1)
+    minutes = _to_number(codes, offset + 11, 2) * 60 + _to_number(codes, offset + 14, 2)
+    return day.astype("datetime64[m]") + minutes
+
+
+def _parse_periods(periods):
+    codes = np.asarray(periods, dtype=f"U{_period_length}")
+    codes = codes.view(np.uint32).reshape(len(codes), _period_length).astype(np.int64)
+    for position, separator in _separators.items():
+        if np.any(codes[:, position] != ord(separator)):
+            raise ValueError(
+                "The time periods are not formatted as 'DD.MM.YYYY HH:MM - DD.MM.YYYY HH:MM'"
+            )
+    return _get_datetimes(codes, 0), _get_datetimes(codes, 19)
+
+
+def _to_utc(local, zone):
+    # The first of two equal local times in autumn is still summer time, and the local times that
+    # do not exist in spring are missing
+    summer_time = ~pd.Index(local).duplicated()
+    index = pd.DatetimeIndex(local).tz_localize(
+        zone, ambiguous=summer_time, nonexistent="NaT"
+    )
+    return index.tz_convert(None).to_numpy()
+
+
+def _read_csv(filename, column):
+    data = pd.read_csv(filename, dtype=str, keep_default_na=False)
+    period_column = data.columns[0]
+    value_column = next(name for name in data.columns if name.startswith(column))
+    start, end = _parse_periods(data[period_column].to_numpy())
+    values = pd.to_numeric(data[value_column], errors="coerce").to_numpy(dtype=float)
+
+    # The duration is taken from the local times, since both are on the same side of a DST change
+    duration = (end - start).astype("timedelta64[ns]")
+    start = start.astype("datetime64[ns]")
+    if "UTC" not in period_column:
+        start = _to_utc(start, timezone)
+    exists = ~np.isnat(start)
+    return {
+        "start": start[exists],
+        "end": start[exists] + duration[exists],
+        "value": values[exists],
+    }
+
+
+def _load(filename, column):
+    # Use the cached arrays if this exact file has been parsed before
+    key = cache.fingerprint(cache.fingerprint_file(filename), column, version)
+    return key, cache.persist("entsoe", key, lambda: _read_csv(filename, column))
+
+
+@cache.memo(maxsize=8)
+def _import_data(filename, modified, size, column):
+    key, arrays = _load(filename, column)
+    data = pd.DataFrame(
+        {"end": arrays["end"], "value": arrays["value"]},
+        index=pd.DatetimeIndex(arrays["start"], name="start"),
+    )
+    return cache.freeze(data, key=key)
+
+
+def import_data(filename, column):
+    """
+    Import a column of an ENTSO-E transparency platform export, such as the day ahead prices or
+    the total load.
+
+    The time periods are converted from CET/CEST to UTC, unless the export is already in UTC. The
+    periods that do not exist at the start of summer time are dropped, and the repeated periods
+    at the end of summer time are kept apart. The data is frozen and shared by all callers until
+    the file changes, so it should not be changed.
+
+    Returns:
+        DataFrame: DataFrame with the start (UTC) as index and the end (UTC) and value of each time period
+    """
+    status = os.stat(filename)
+    return _import_data(filename, status.st_mtime_ns, status.st_size, column)
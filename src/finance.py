@@ -0,0 +1,23 @@
+def calculate_payback_period(investment, annual_revenue):
+    """
+    Calculate the number of years it takes to earn back the investment.
+
+    Returns:
+        float: Payback period (years)
+    """
+    return investment / annual_revenue
+
+
+def calculate_lcoe(
+    investment, annual_production, *, discount_rate, deprecation_period, om_costs=0
+):
+    """
+    Calculate the levelized cost of energy.
+
+    Returns:
+        float: LCOE (€/MWh)
+    """
+    capital_recovery_factor = discount_rate / (
+        1 - (1 + discount_rate) ** -deprecation_period
+    )
+    return (capital_recovery_factor * investment + om_costs) / annual_production
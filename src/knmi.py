@@ -1,50 +1,163 @@
-import streamlit as st
+import numpy as np
+import os
 import pandas as pd
+import re
+import cache
+
+# Increase the version when the parser changes, so old cache files are no longer used
+version = 2
 
 columns = {
+    "STN": "station",
     "YYYYMMDD": "date",
-    "   HH": "hour",
-    "   DD": "wind_direction",
-    "   FH": "wind_speed",
-    "    T": "temperature",
-    "    P": "air_pressure",
-    "    Q": "ghi",
+    "HH": "hour",
+    "DD": "wind_direction",
+    "FH": "wind_speed",
+    "T": "temperature",
+    "P": "air_pressure",
+    "Q": "ghi",
 }
 
 
-@st.experimental_memo
+def _find_header(filename):
+    # Find the line with the column names, since the length of the description differs per file
+    with open(filename) as file:
+        for line_number, line in enumerate(file):
+            if line.lstrip("# ").startswith("STN,YYYYMMDD"):
+                return line_number
+    raise ValueError(f"{filename} is not a KNMI hourly data file")
+
+
+def _get_datetimes(date, hour):
+    # Build the timestamps from the date and hour numbers, without converting them to strings
+    year = (date // 10000 - 1970).astype("datetime64[Y]")
+    month = year.astype("datetime64[M]") + (date // 100 % 100 - 1)
+    day = month.astype("datetime64[D]") + (date % 100 - 1)
+
+    # Hour 1 runs from 00:00 to 01:00 UT, so the timestamp is set to the middle of the hour
+    minutes = hour * 60 - 30
+    return day.astype("datetime64[m]") + minutes
+
+
+def _read_csv(filename, **kwargs):
+    # Only parse the relevant columns directly into numbers
+    return pd.read_csv(
+        filename,
+        skiprows=_find_header(filename),
+        skipinitialspace=True,
+        usecols=lambda column: column.lstrip("# ") in columns,
+        dtype=float,
+        **kwargs,
+    )
+
+
+def _transform(knmi):
+    knmi = knmi.rename(columns=lambda column: columns[column.lstrip("# ")])
+
+    # Fix the units
+    date = knmi.date.to_numpy(dtype=np.int64)
+    hour = knmi.hour.to_numpy(dtype=np.int64)
+    return {
+        "datetime": _get_datetimes(date, hour).astype("datetime64[ns]"),
+        "station": knmi.station.to_numpy(dtype=np.int64),
+        "wind_direction": knmi.wind_direction.to_numpy(),
+        "wind_speed": knmi.wind_speed.to_numpy() / 10,
+        "temperature": knmi.temperature.to_numpy() / 10,
+        "ghi": knmi.ghi.to_numpy() * 100 ** 2 / 60 / 60,  # J/cm2 to kW/m2
+        "air_pressure": knmi.air_pressure.to_numpy() / 10 ** 4,
+    }
+
+
+def _load(filename):
+    # Use the cached arrays if this exact file has been parsed before
+    key = cache.fingerprint(cache.fingerprint_file(filename), version)
+    return key, cache.persist("knmi", key, lambda: _transform(_read_csv(filename)))
+
+
+@cache.memo(maxsize=8)
+def _import_data(filename, modified, size, year):
+    key, arrays = _load(filename)
+
+    # Set the datetime as index and keep only the relevant columns
+    knmi = pd.DataFrame(
+        {
+            column: values
+            for column, values in arrays.items()
+            if column not in ["datetime", "station"]
+        },
+        index=pd.DatetimeIndex(arrays["datetime"], name="datetime"),
+    )
+
+    # Filter to the current year and use the fingerprint of the file as fingerprint of the data
+    knmi = knmi[knmi.index.year == year]
+    return cache.freeze(knmi, key=cache.fingerprint(key, year))
+
+
 def import_data(filename, year):
     """
     Get and transform the KNMI dataset.
 
+    The data is frozen and shared by all callers until the file changes, so it should not be
+    changed. Its fingerprint is based on the content of the file, so it is never hashed.
+
     Returns:
         DataFrame: DataFrame with the KNMI weather data
     """
-    # Import the CSV file and set the column names
-    knmi = pd.read_csv(filename, skiprows=range(0, 31))
-    knmi = knmi[columns.keys()]
-    knmi.columns = columns.values()
-
-    # Fix datetime index
-    knmi.date = knmi.date.astype(str)
-    knmi.hour = knmi.hour.apply(lambda hour: str(hour).zfill(2))
-    knmi.hour = knmi.hour.replace("24", "00")
-    knmi["datetime"] = knmi.date + knmi.hour + "00"
-    knmi.datetime = pd.to_datetime(knmi.datetime, format="%Y%m%d%H%M")
-    knmi.datetime = knmi.datetime + pd.Timedelta(hours=-1, minutes=30)
-
-    # Filter to the current year
-    knmi = knmi[knmi.datetime.dt.year == year]
+    status = os.stat(filename)
+    return _import_data(filename, status.st_mtime_ns, status.st_size, year)
 
-    # Fix the units
-    knmi.wind_speed = knmi.wind_speed.astype(int) / 10
-    knmi.temperature = knmi.temperature.astype(int) / 10
-    knmi.air_pressure = knmi.air_pressure.astype(int) / 10 ** 4
-    knmi.ghi = knmi.ghi.astype(int) * 100 ** 2 / 60 / 60  # J/cm2 to kW/m2
 
-    # Set the datetime as index and keep only the relevant columns
-    knmi.index = knmi.datetime
-    knmi = knmi[["wind_direction", "wind_speed", "temperature", "ghi", "air_pressure",]]
+def read_stations(filename):
+    """
+    Get the coordinates of the stations from the description of a KNMI file.
+
+    Returns:
+        dict: Dictionary with the latitude and longitude of each station
+    """
+    stations = {}
+    with open(filename) as file:
+        for line in file:
+            match = re.match(r"^#?\s*(\d+):\s+(-?[\d.]+)\s+(-?[\d.]+)", line)
+            if match:
+                station, lon, lat = match.groups()
+                stations[int(station)] = {"lat": float(lat), "lon": float(lon)}
+            elif line.lstrip("# ").startswith("STN,YYYYMMDD"):
+                return stations
+    return stations
+
+
+def read_chunks(filename, *, period="year", chunksize=100_000):
+    """
+    Read a KNMI file of any size in chunks of a single year or month for each station.
+
+    Only one chunk of rows and one period are kept in memory at the same time, since the KNMI
+    files are sorted by station and time.
+
+    Yields:
+        tuple: The station, the year or month (Period), and a DataFrame with the weather data
+    """
+    frequency = {"year": "Y", "month": "M"}[period]
+    remainder = None
+
+    for chunk in _read_csv(filename, chunksize=chunksize):
+        arrays = _transform(chunk)
+        knmi = pd.DataFrame(arrays).set_index("datetime")
+        if remainder is not None:
+            knmi = pd.concat([remainder, knmi])
+
+        # Split the chunk into periods, the last period might continue in the next chunk
+        periods = knmi.index.to_period(frequency)
+        boundaries = (periods[1:] != periods[:-1]) | (
+            knmi.station.to_numpy()[1:] != knmi.station.to_numpy()[:-1]
+        )
+        starts = np.concatenate([[0], np.flatnonzero(boundaries) + 1])
+        for start, end in zip(starts[:-1], starts[1:]):
+            group = knmi.iloc[start:end]
+            station = int(group.station.iat[0])
+            yield station, periods[start], group.drop(columns="station")
+        remainder = knmi.iloc[starts[-1] :]
 
-    # Return the DataFrame
-    return knmi
+    if remainder is not None and len(remainder):
+        station = int(remainder.station.iat[0])
+        period = remainder.index[0].to_period(frequency)
+        yield station, period, remainder.drop(columns="station")
@@ -1,40 +1,60 @@
-import pandas as pd
-
+import cache
 import config
 import knmi
+import model
+import profiler
 import question1
 import question2
 import question3
 import question5
 import question6
 import question7
+import store
 
 # Initialize the Streamlit configs
 config.initialize()
+recorder = profiler.start()
 
 # Import the core data
-data = knmi.import_data("input/weather.csv", 2018)
+with profiler.span("weather", category="input"):
+    weather = knmi.import_data("input/weather.csv", 2018)
 
 # Set the default parameters
-parameters = {
-    "location": {"lat": 51.74960549452203, "lon": 4.2120415560786615},
-    "wind": {
-        "rated_power": 7.5,
-        "rotor_diameter": 127,
-        "hub_height": 135,
-        "power_coefficients": pd.read_csv(
-            "input/power_coefficients", index_col="wind_speed"
-        ),
-    },
-    "pv": {"rated_power": 240},
-    "storage": {"efficiency": 0.9},
-    "financial": {"sde_price": 58},
-}
-
-# Calculate all questions
-question1.calculate(data, parameters)
-question2.calculate(data, parameters)
-question3.calculate(data, parameters)
-question5.calculate(data)
-question6.calculate(data, parameters)
-question7.calculate(data, parameters)
+parameters = model.default_parameters()
+
+# Get the input parameters
+question1.ask_input(parameters)
+question6.ask_input(parameters)
+question7.ask_input(parameters)
+
+# Run the model, only the stages of which an input changed are recalculated, and sessions with
+# the same inputs share the results
+with profiler.span("model", category="model"):
+    key = store.get_key(
+        weather,
+        parameters,
+        store.get_file_key("input/demand.csv"),
+        store.get_file_key("input/day_ahead_prices.csv"),
+    )
+    results = store.get_store().get(key, lambda: model.run(weather, parameters))
+
+    # The results of a key do not change, so the key is used as the fingerprint of the data and
+    # the memoized summaries of the questions do not hash the data again on every rerun
+    cache.freeze(results.data, key=key)
+
+# Show all questions
+with profiler.span("question1", category="question"):
+    question1.calculate(results.data, parameters)
+with profiler.span("question2", category="question"):
+    question2.calculate(results.data, parameters)
+with profiler.span("question3", category="question"):
+    question3.calculate(results.data, parameters)
+with profiler.span("question5", category="question"):
+    question5.calculate(results.data)
+with profiler.span("question6", category="question"):
+    question6.calculate(results.data, parameters)
+with profiler.span("question7", category="question"):
+    question7.calculate(results, parameters)
+
+# Show the duration of each stage if the profiler is enabled
+config.show_profiler(recorder)
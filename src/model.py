@@ -0,0 +1,428 @@
+from dataclasses import dataclass, fields
+import copy
+import numpy as np
+import pandas as pd
+import balance
+import battery
+import cache
+import dispatch
+import finance
+import pv
+import stages
+import timeseries
+import wind
+
+default_wind_capacity = 25
+default_pv_capacity = 35
+
+
+@dataclass
+class Results:
+    data: pd.DataFrame
+    production_wind: float
+    production_pv: float
+    capacity_factor_wind: float
+    capacity_factor_pv: float
+    capacity_factor_total: float
+    curtailed: float
+    unserved: float
+    curtailed_w_storage: float
+    unserved_w_storage: float
+    revenue: float
+    payback_period: float
+    payback_period_sde: float
+    lcoe: float
+
+    def summarize(self):
+        """
+        Get all results except the timeseries.
+
+        Returns:
+            dict: Dictionary with the annual totals (MWh), capacity factors, and financial metrics
+        """
+        return {
+            field.name: float(getattr(self, field.name))
+            for field in fields(self)
+            if field.name != "data"
+        }
+
+
+def size(parameters, *, wind_capacity, pv_capacity):
+    """
+    Set the number of wind turbines and PV panels required for at least the given capacities (MW).
+    """
+    num_turbines = wind.get_num_turbines(wind_capacity, parameters)
+    parameters["wind"]["num_turbines"] = num_turbines
+    parameters["wind"]["capacity"] = num_turbines * parameters["wind"]["rated_power"]
+
+    num_panels = pv.get_num_panels(pv_capacity, parameters)
+    parameters["pv"]["num_panels"] = num_panels
+    parameters["pv"]["capacity"] = num_panels * parameters["pv"]["rated_power"] / 10 ** 6
+
+
+def default_parameters():
+    """
+    Get the default parameters, which are the same as the default inputs of the website.
+
+    Returns:
+        dict: Dictionary with the parameters
+    """
+    parameters = {
+        "location": {"lat": 51.74960549452203, "lon": 4.2120415560786615},
+        "wind": {
+            "rated_power": 7.5,
+            "rotor_diameter": 127,
+            "hub_height": 135,
+            "power_coefficients": cache.freeze(
+                pd.read_csv("input/power_coefficients", index_col="wind_speed")
+            ),
+        },
+        "pv": {"rated_power": 240, "tilt": 35, "azimuth": 180},
+        "storage": {
+            "efficiency": 0.9,
+            "power_rating": 5,
+            "energy_rating": 5,
+            "dispatch": "greedy",
+        },
+        "financial": {
+            "sde_price": 58,
+            "sde_enabled": False,
+            "investment": 62.0,
+            "discount_rate": 0.07,
+            "deprecation_period": 20,
+        },
+    }
+    size(
+        parameters,
+        wind_capacity=default_wind_capacity,
+        pv_capacity=default_pv_capacity,
+    )
+    return parameters
+
+
+def create_parameters(scenario):
+    """
+    Create the parameters for a scenario, which only has to contain the values that differ from the
+    defaults. The wind and PV capacities in a scenario are the required capacities (MW).
+
+    Returns:
+        dict: Dictionary with the parameters
+    """
+    parameters = default_parameters()
+    for group, values in scenario.items():
+        if isinstance(values, dict):
+            parameters.setdefault(group, {}).update(copy.deepcopy(values))
+
+    size(
+        parameters,
+        wind_capacity=scenario.get("wind", {}).get("capacity", default_wind_capacity),
+        pv_capacity=scenario.get("pv", {}).get("capacity", default_pv_capacity),
+    )
+    return parameters
+
+
+def _calculate_production_wind(weather, wind_parameters):
+    return wind.calculate(weather, {"wind": wind_parameters})
+
+
+def _calculate_production_pv(weather, location_parameters, pv_parameters):
+    parameters = {"location": location_parameters, "pv": pv_parameters}
+    return pv.calculate(weather, parameters)
+
+
+def _get_index(weather):
+    return weather.index
+
+
+# The keys of the files are inputs of the stages, so the stages are rerun when a file changes
+def _import_demand(index, demand_filename, demand_file_keys):
+    return timeseries.import_demand(demand_filename, index)
+
+
+def _import_day_ahead_prices(index, prices_filename, prices_file_keys):
+    return timeseries.import_day_ahead_prices(prices_filename, index)
+
+
+def _calculate_balance(production_wind, production_pv, demand):
+    return balance.calculate(production_wind + production_pv, demand)
+
+
+def _simulate_battery(
+    production_wind, production_pv, demand, day_ahead_price, storage_parameters
+):
+    production = production_wind + production_pv
+    timestep = timeseries.get_timestep(demand.index)
+    mode = storage_parameters.get("dispatch", "greedy")
+    if storage_parameters["power_rating"] <= 0 or storage_parameters["energy_rating"] <= 0:
+        # Without a battery there is nothing to dispatch
+        zeros = np.zeros((len(demand), 1))
+        simulation = battery.Simulation(soc=zeros, flow=zeros, curtailed=None, unserved=None)
+    elif mode == "greedy":
+        simulation = battery.simulate(
+            production - demand,
+            power_ratings=storage_parameters["power_rating"],
+            energy_ratings=storage_parameters["energy_rating"],
+            efficiencies=storage_parameters["efficiency"],
+            timestep=timestep,
+        )
+    elif mode in dispatch.modes:
+        simulation = dispatch.optimize(
+            production - demand,
+            day_ahead_price,
+            power_rating=storage_parameters["power_rating"],
+            energy_rating=storage_parameters["energy_rating"],
+            efficiency=storage_parameters["efficiency"],
+            timestep=timestep,
+            window=None if mode == "perfect_foresight" else 48,
+        )
+    else:
+        raise ValueError(f"Unknown battery dispatch mode '{mode}'")
+    battery_soc = pd.Series(simulation.soc[:, 0], index=demand.index)
+    battery_flow = pd.Series(simulation.flow[:, 0], index=demand.index)
+    curtailed, unserved = balance.calculate(production, demand, battery_flow)
+    return battery_soc, battery_flow, curtailed, unserved
+
+
+def _calculate_capacity_factors(
+    production_wind, production_pv, wind_parameters, pv_parameters
+):
+    # Calculate the capacity factors over the number of hours in the data
+    hours = len(production_wind) * timeseries.get_timestep(production_wind.index)
+    capacity_wind = wind_parameters["capacity"]
+    capacity_pv = pv_parameters["capacity"]
+    energy_wind = timeseries.get_energy(production_wind)
+    energy_pv = timeseries.get_energy(production_pv)
+    return (
+        energy_wind / (capacity_wind * hours),
+        energy_pv / (capacity_pv * hours),
+        (energy_wind + energy_pv) / ((capacity_wind + capacity_pv) * hours),
+    )
+
+
+def _calculate_revenue(
+    production_wind, production_pv, day_ahead_price, battery_flow, storage_parameters
+):
+    # The revenue (€) of each timestep is the price times the energy that is sold in the timestep,
+    # which is the production minus the energy the battery takes from the grid
+    timestep = timeseries.get_timestep(day_ahead_price.index)
+    grid_flow = battery.get_grid_flow(battery_flow, storage_parameters["efficiency"])
+    return day_ahead_price * (production_wind + production_pv - grid_flow) * timestep
+
+
+def _calculate_financials(
+    production_wind, production_pv, revenue, financial_parameters
+):
+    investment = financial_parameters["investment"] * 10 ** 6
+    sde_price = financial_parameters["sde_price"]
+    production = timeseries.get_energy(production_wind) + timeseries.get_energy(
+        production_pv
+    )
+
+    # The prices can be missing for some timesteps, which are left out of the total revenue
+    total_revenue = float(np.nansum(revenue))
+    payback_period = finance.calculate_payback_period(investment, total_revenue)
+    payback_period_sde = finance.calculate_payback_period(
+        investment, production * sde_price
+    )
+    lcoe = finance.calculate_lcoe(
+        investment,
+        production,
+        discount_rate=financial_parameters["discount_rate"],
+        deprecation_period=financial_parameters["deprecation_period"],
+    )
+    return total_revenue, payback_period, payback_period_sde, lcoe
+
+
+graph = stages.Graph(
+    [
+        stages.Stage(
+            "production_wind",
+            _calculate_production_wind,
+            inputs=("weather", "wind_parameters"),
+            outputs=("production_wind",),
+        ),
+        stages.Stage(
+            "production_pv",
+            _calculate_production_pv,
+            inputs=("weather", "location_parameters", "pv_parameters"),
+            outputs=("production_pv",),
+        ),
+        stages.Stage("index", _get_index, inputs=("weather",), outputs=("index",)),
+        stages.Stage(
+            "demand",
+            _import_demand,
+            inputs=("index", "demand_filename", "demand_file_keys"),
+            outputs=("demand",),
+        ),
+        stages.Stage(
+            "balance",
+            _calculate_balance,
+            inputs=("production_wind", "production_pv", "demand"),
+            outputs=("curtailed", "unserved"),
+        ),
+        stages.Stage(
+            "battery",
+            _simulate_battery,
+            inputs=(
+                "production_wind",
+                "production_pv",
+                "demand",
+                "day_ahead_price",
+                "storage_parameters",
+            ),
+            outputs=(
+                "battery_soc",
+                "battery_flow",
+                "curtailed_w_storage",
+                "unserved_w_storage",
+            ),
+            process=True,
+        ),
+        stages.Stage(
+            "capacity_factors",
+            _calculate_capacity_factors,
+            inputs=("production_wind", "production_pv", "wind_parameters", "pv_parameters"),
+            outputs=(
+                "capacity_factor_wind",
+                "capacity_factor_pv",
+                "capacity_factor_total",
+            ),
+        ),
+        stages.Stage(
+            "day_ahead_price",
+            _import_day_ahead_prices,
+            inputs=("index", "prices_filename", "prices_file_keys"),
+            outputs=("day_ahead_price",),
+        ),
+        stages.Stage(
+            "revenue",
+            _calculate_revenue,
+            inputs=(
+                "production_wind",
+                "production_pv",
+                "day_ahead_price",
+                "battery_flow",
+                "storage_parameters",
+            ),
+            outputs=("revenue",),
+        ),
+        stages.Stage(
+            "financials",
+            _calculate_financials,
+            inputs=("production_wind", "production_pv", "revenue", "financial_parameters"),
+            outputs=("total_revenue", "payback_period", "payback_period_sde", "lcoe"),
+        ),
+    ],
+    name="model",
+)
+
+columns = [
+    "production_wind",
+    "production_pv",
+    "demand",
+    "curtailed",
+    "unserved",
+    "battery_soc",
+    "battery_flow",
+    "curtailed_w_storage",
+    "unserved_w_storage",
+    "day_ahead_price",
+    "revenue",
+]
+
+
+def _create_results(values, index):
+    data = pd.DataFrame(
+        {column: np.asarray(values[column], dtype=np.float32) for column in columns},
+        index=index,
+    )
+
+    # Calculate the totals from the original values, so no precision is lost
+    return Results(
+        data=data,
+        production_wind=timeseries.get_energy(values["production_wind"]),
+        production_pv=timeseries.get_energy(values["production_pv"]),
+        capacity_factor_wind=values["capacity_factor_wind"],
+        capacity_factor_pv=values["capacity_factor_pv"],
+        capacity_factor_total=values["capacity_factor_total"],
+        curtailed=timeseries.get_energy(values["curtailed"]),
+        unserved=timeseries.get_energy(values["unserved"]),
+        curtailed_w_storage=timeseries.get_energy(values["curtailed_w_storage"]),
+        unserved_w_storage=timeseries.get_energy(values["unserved_w_storage"]),
+        revenue=values["total_revenue"],
+        payback_period=values["payback_period"],
+        payback_period_sde=values["payback_period_sde"],
+        lcoe=values["lcoe"],
+    )
+
+
+def _run_graph(sources, parameters, *, demand_filename, prices_filename):
+    sources = {
+        **sources,
+        "demand_filename": demand_filename,
+        "demand_file_keys": timeseries.get_file_keys(demand_filename),
+        "prices_filename": prices_filename,
+        "prices_file_keys": timeseries.get_file_keys(prices_filename),
+    }
+    # Freeze the parameters, so their fingerprints are only calculated once
+    for group, values in parameters.items():
+        sources[f"{group}_parameters"] = cache.freeze(values)
+    values, _ = graph.run(sources)
+    return values
+
+
+def run(
+    weather,
+    parameters,
+    *,
+    demand_filename="input/demand.csv",
+    prices_filename="input/day_ahead_prices.csv",
+):
+    """
+    Calculate the production, energy balance, battery performance, and financial metrics.
+
+    Only the stages of which one of the inputs changed since a previous run are recalculated. The
+    weather data can have any timestep, the columns of the data contain the average power (MW)
+    or price of each timestep and are stored as float32 to limit the memory of short timesteps.
+
+    Returns:
+        Results: Results of the model
+    """
+    values = _run_graph(
+        {"weather": weather},
+        parameters,
+        demand_filename=demand_filename,
+        prices_filename=prices_filename,
+    )
+    return _create_results(values, weather.index)
+
+
+def run_production(
+    production_wind,
+    production_pv,
+    parameters,
+    *,
+    demand_filename="input/demand.csv",
+    prices_filename="input/day_ahead_prices.csv",
+):
+    """
+    Calculate the energy balance, battery performance, and financial metrics of a given production,
+    for example the combined production of several parks.
+
+    The production stages of the model are skipped, so the parameters only need the wind and PV
+    capacity (MW) and the storage and financial parameters.
+
+    Returns:
+        Results: Results of the model
+    """
+    values = _run_graph(
+        {
+            "index": production_wind.index,
+            "production_wind": production_wind,
+            "production_pv": production_pv,
+        },
+        parameters,
+        demand_filename=demand_filename,
+        prices_filename=prices_filename,
+    )
+    return _create_results(values, production_wind.index)
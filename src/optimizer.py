@@ -0,0 +1,277 @@
+import argparse
+import concurrent.futures
+import itertools
+import numpy as np
+import pandas as pd
+import battery
+import finance
+import knmi
+import model
+import pv
+import timeseries
+import wind
+
+# Investment costs (€/MW and €/MWh), which add up to the default investment of 62M€
+default_costs = {
+    "wind": 1.3 * 10 ** 6,
+    "pv": 0.6 * 10 ** 6,
+    "battery_power": 0.15 * 10 ** 6,
+    "battery_energy": 0.25 * 10 ** 6,
+}
+
+# Bounds of the design space, the battery ratings are evaluated in a single batch per design
+default_space = {
+    "num_turbines": (0, 8),
+    "pv_capacity": (0, 60),
+    "tilt": (0, 90),
+    "azimuth": (90, 270),
+}
+default_power_ratings = [1, 2.5, 5, 10, 20, 40, 60]
+default_energy_ratings = [1, 2.5, 5, 10, 20, 40, 80, 120]
+
+columns = [
+    "num_turbines",
+    "pv_capacity",
+    "tilt",
+    "azimuth",
+    "power_rating",
+    "energy_rating",
+    "investment",
+    "lcoe",
+    "payback_period",
+    "unserved",
+    "curtailed",
+]
+objectives = ["lcoe", "unserved", "curtailed"]
+
+# The context is set once per worker process, so the data is not pickled for every task
+_context = {}
+
+
+def _initialize(weather, demand, prices, parameters, costs, power_ratings, energy_ratings):
+    ratings = np.array(list(itertools.product(power_ratings, energy_ratings)))
+    _context.update(
+        weather=weather,
+        demand=demand.to_numpy(),
+        prices=prices.to_numpy(),
+        parameters=parameters,
+        costs=costs,
+        power_ratings=ratings[:, 0],
+        energy_ratings=ratings[:, 1],
+        timestep=timeseries.get_timestep(weather.index),
+        profile_wind=wind.calculate(
+            weather, {"wind": {**parameters["wind"], "num_turbines": 1}}
+        ).to_numpy(),
+    )
+
+
+def _get_profile_pv(tilt, azimuth):
+    parameters = _context["parameters"]
+    pv_parameters = {**parameters["pv"], "tilt": tilt, "azimuth": azimuth, "num_panels": 1}
+    profile = pv.calculate(
+        _context["weather"], {"location": parameters["location"], "pv": pv_parameters}
+    )
+    return profile.to_numpy()
+
+
+def _evaluate(design):
+    num_turbines, pv_capacity, tilt, azimuth = design
+    parameters = _context["parameters"]
+    costs = _context["costs"]
+    power_ratings = _context["power_ratings"]
+    energy_ratings = _context["energy_ratings"]
+    timestep = _context["timestep"]
+
+    # Scale the per-unit profiles to the size of the park
+    num_panels = pv.get_num_panels(pv_capacity, parameters)
+    production = num_turbines * _context["profile_wind"]
+    if num_panels:
+        production = production + num_panels * _get_profile_pv(tilt, azimuth)
+
+    # Simulate all battery ratings for this design at once
+    simulation = battery.simulate(
+        production - _context["demand"],
+        power_ratings=power_ratings,
+        energy_ratings=energy_ratings,
+        efficiencies=parameters["storage"]["efficiency"],
+        timestep=timestep,
+        dtype=np.float32,
+    )
+
+    # Calculate the financial metrics of each battery rating
+    capacity_wind = num_turbines * parameters["wind"]["rated_power"]
+    capacity_pv = num_panels * parameters["pv"]["rated_power"] / 10 ** 6
+    investment = (
+        costs["wind"] * capacity_wind
+        + costs["pv"] * capacity_pv
+        + costs["battery_power"] * power_ratings
+        + costs["battery_energy"] * energy_ratings
+    )
+    annual_production = production.sum() * timestep
+    grid_flow = battery.get_grid_flow(simulation.flow, parameters["storage"]["efficiency"])
+    sold = production[:, np.newaxis] - grid_flow
+    annual_revenue = np.nansum(_context["prices"][:, np.newaxis] * sold, axis=0) * timestep
+    lcoe = finance.calculate_lcoe(
+        investment,
+        annual_production,
+        discount_rate=parameters["financial"]["discount_rate"],
+        deprecation_period=parameters["financial"]["deprecation_period"],
+    )
+    payback_period = finance.calculate_payback_period(investment, annual_revenue)
+
+    num_ratings = len(power_ratings)
+    return np.column_stack(
+        [
+            np.full((num_ratings, 4), design, dtype=float),
+            power_ratings,
+            energy_ratings,
+            investment,
+            lcoe,
+            payback_period,
+            simulation.unserved,
+            simulation.curtailed,
+        ]
+    )
+
+
+def get_pareto_front(values):
+    """
+    Find the designs that are not dominated by another design, all objectives are minimized.
+
+    Returns:
+        ndarray: Boolean mask of the non-dominated rows
+    """
+    values = np.asarray(values)
+    efficient = np.ones(len(values), dtype=bool)
+
+    # Only keep the first of the designs with exactly the same objectives
+    _, first = np.unique(values, axis=0, return_index=True)
+    efficient[np.setdiff1d(np.arange(len(values)), first)] = False
+
+    for index in np.argsort(values[:, 0]):
+        if not efficient[index]:
+            continue
+        dominated = np.all(values >= values[index], axis=1) & np.any(
+            values > values[index], axis=1
+        )
+        efficient &= ~dominated
+    return efficient
+
+
+def _get_grid(space, num_points):
+    grid = []
+    for name, (low, high) in space.items():
+        points = np.linspace(low, high, num_points)
+        if name == "num_turbines":
+            points = np.unique(np.round(points))
+        grid.append(points)
+    return set(itertools.product(*grid))
+
+
+def _normalize(design, space):
+    # The orientation does not matter without PV panels, so use a single orientation for those designs
+    num_turbines, pv_capacity, tilt, azimuth = design
+    if pv_capacity == 0:
+        tilt, azimuth = space["tilt"][0], space["azimuth"][0]
+    return num_turbines, pv_capacity, tilt, azimuth
+
+
+def _get_neighbours(design, space, steps):
+    # Move a single step up and down along each dimension of the design space
+    neighbours = set()
+    for dimension, (name, (low, high)) in enumerate(space.items()):
+        for direction in [-1, 1]:
+            value = design[dimension] + direction * steps[dimension]
+            value = min(max(value, low), high)
+            if name == "num_turbines":
+                value = round(value)
+            neighbour = design[:dimension] + (value,) + design[dimension + 1 :]
+            neighbours.add(_normalize(neighbour, space))
+    return neighbours
+
+
+def optimize(
+    weather,
+    parameters,
+    *,
+    demand,
+    prices,
+    costs=default_costs,
+    space=default_space,
+    power_ratings=default_power_ratings,
+    energy_ratings=default_energy_ratings,
+    num_points=5,
+    num_refinements=3,
+    max_workers=None,
+):
+    """
+    Search the design space for the Pareto front of LCOE, unserved energy, and curtailed energy.
+
+    The search starts with a coarse grid, after which only the neighbourhoods of the designs on the
+    Pareto front are refined with half the step size, so dominated regions are never refined.
+
+    Returns:
+        DataFrame: DataFrame with the designs on the Pareto front
+    """
+    steps = [(high - low) / (num_points - 1) for low, high in space.values()]
+    candidates = {_normalize(design, space) for design in _get_grid(space, num_points)}
+    evaluated = set()
+    results = np.empty((0, len(columns)))
+
+    initargs = (weather, demand, prices, parameters, costs, power_ratings, energy_ratings)
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers, initializer=_initialize, initargs=initargs
+    ) as executor:
+        for _ in range(num_refinements + 1):
+            # Skip the designs that have been evaluated before or do not produce anything
+            candidates = [
+                candidate
+                for candidate in candidates
+                if candidate not in evaluated and (candidate[0] or candidate[1])
+            ]
+            evaluated.update(candidates)
+            rows = list(executor.map(_evaluate, candidates, chunksize=4))
+            results = np.concatenate([results, *rows])
+
+            # Only keep the designs on the Pareto front
+            values = results[:, [columns.index(name) for name in objectives]]
+            results = results[get_pareto_front(values)]
+
+            # Refine the neighbourhood of the designs on the front
+            steps = [step / 2 for step in steps]
+            candidates = set()
+            for design in {tuple(row[:4]) for row in results}:
+                candidates |= _get_neighbours(design, space, steps)
+
+    front = pd.DataFrame(results, columns=columns)
+    return front.sort_values("lcoe").reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Find the Pareto front of LCOE, unserved energy, and curtailed energy"
+    )
+    parser.add_argument("--weather", default="input/weather.csv")
+    parser.add_argument("--year", type=int, default=2018)
+    parser.add_argument("--points", type=int, default=5)
+    parser.add_argument("--refinements", type=int, default=3)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--output", help="path of the CSV file the front is written to")
+    args = parser.parse_args()
+
+    weather = knmi.import_data(args.weather, args.year)
+    front = optimize(
+        weather,
+        model.default_parameters(),
+        demand=timeseries.import_demand("input/demand.csv", weather.index),
+        prices=timeseries.import_day_ahead_prices(
+            "input/day_ahead_prices.csv", weather.index
+        ),
+        num_points=args.points,
+        num_refinements=args.refinements,
+        max_workers=args.workers,
+    )
+    if args.output:
+        front.to_csv(args.output, index=False)
+    else:
+        print(front.to_string())
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import balance
+import knmi
+import pv
+import timeseries
+import wind
+
+
+def _get_demand(demand, index):
+    # Repeat the demand profile of 365 days for every year by the calendar day and hour of each
+    # timestep
+    demand = np.asarray(demand)
+    if len(demand) != 365 * 24:
+        raise ValueError(f"The demand profile should have 8760 hours, not {len(demand)}")
+    day = timeseries.get_calendar_days(index)
+    return demand[day * 24 + index.hour.to_numpy()]
+
+
+def aggregate(filename, parameters, *, period="year", demand=None):
+    """
+    Calculate the annual production for each station in a KNMI file, one chunk at a time.
+
+    The coordinates of the stations in the file are used as the location of the PV panels. When a
+    demand profile (MW for each hour of a year of 365 days) is given, the curtailed and unserved energy are
+    calculated as well.
+
+    Yields:
+        tuple: The station, year, and a dictionary with the running annual totals after each chunk
+    """
+    stations = knmi.read_stations(filename)
+    totals = {}
+
+    for station, _, weather in knmi.read_chunks(filename, period=period):
+        location = stations.get(station, parameters["location"])
+        chunk_parameters = {**parameters, "location": location}
+
+        # Calculate the production for this chunk
+        production_wind = wind.calculate(weather, chunk_parameters)
+        production_pv = pv.calculate(weather, chunk_parameters)
+        production = production_wind.to_numpy() + production_pv.to_numpy()
+
+        # Add the energy of the chunk to the running totals of its year
+        year = weather.index[0].year
+        timestep = timeseries.get_timestep(weather.index)
+        total = totals.setdefault((station, year), {"hours": 0})
+        total["hours"] += len(weather) * timestep
+        total["production_wind"] = (
+            total.get("production_wind", 0) + production_wind.sum() * timestep
+        )
+        total["production_pv"] = total.get("production_pv", 0) + production_pv.sum() * timestep
+        if demand is not None:
+            chunk_demand = _get_demand(demand, weather.index)
+            curtailed, unserved = balance.calculate(production, chunk_demand)
+            total["demand"] = total.get("demand", 0) + chunk_demand.sum() * timestep
+            total["curtailed"] = total.get("curtailed", 0) + curtailed.sum() * timestep
+            total["unserved"] = total.get("unserved", 0) + unserved.sum() * timestep
+
+        yield station, year, dict(total)
+
+
+def run(filename, parameters, *, period="year", demand=None):
+    """
+    Calculate the annual production for each station in a KNMI file with bounded memory.
+
+    Returns:
+        DataFrame: DataFrame with the annual totals (MWh) for each station and year
+    """
+    totals = {}
+    for station, year, total in aggregate(
+        filename, parameters, period=period, demand=demand
+    ):
+        totals[(station, year)] = total
+
+    index = pd.MultiIndex.from_tuples(totals.keys(), names=["station", "year"])
+    return pd.DataFrame(list(totals.values()), index=index)
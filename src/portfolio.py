@@ -0,0 +1,160 @@
+from dataclasses import dataclass
+import argparse
+import concurrent.futures
+import os
+import numpy as np
+import pandas as pd
+import cli
+import knmi
+import model
+
+# The context is set once per worker process, so only the small site dictionaries are sent to the workers
+_context = {}
+
+
+@dataclass
+class Portfolio:
+    sites: pd.DataFrame
+    results: model.Results
+
+
+def _initialize(year, demand_filename, prices_filename):
+    _context.update(
+        year=year,
+        demand_filename=demand_filename,
+        prices_filename=prices_filename,
+        weather={},
+    )
+
+
+def _get_weather(filename):
+    # Every worker imports each weather file only once
+    if filename not in _context["weather"]:
+        _context["weather"][filename] = knmi.import_data(filename, _context["year"])
+    return _context["weather"][filename]
+
+
+def _evaluate(site):
+    weather = _get_weather(site.get("weather", "input/weather.csv"))
+    parameters = model.create_parameters(site)
+    results = model.run(
+        weather,
+        parameters,
+        demand_filename=_context["demand_filename"],
+        prices_filename=_context["prices_filename"],
+    )
+    details = {
+        "capacity_wind": parameters["wind"]["capacity"],
+        "capacity_pv": parameters["pv"]["capacity"],
+        "power_rating": parameters["storage"]["power_rating"],
+        "energy_rating": parameters["storage"]["energy_rating"],
+        "efficiency": parameters["storage"]["efficiency"],
+        "dispatch": parameters["storage"]["dispatch"],
+        "investment": parameters["financial"]["investment"],
+    }
+    production = results.data[["production_wind", "production_pv"]]
+    return {**details, **results.summarize()}, production
+
+
+def _get_storage_parameters(sites):
+    # Use the combined storage of all sites as a single battery with their average efficiency,
+    # which is weighted by the energy rating if any site has storage
+    modes = sites.dispatch.unique()
+    if len(modes) > 1:
+        raise ValueError(
+            f"The sites of a portfolio should use the same battery dispatch mode, not {list(modes)}"
+        )
+    energy_rating = sites.energy_rating.sum()
+    weights = sites.energy_rating if energy_rating > 0 else None
+    return {
+        "power_rating": sites.power_rating.sum(),
+        "energy_rating": energy_rating,
+        "efficiency": np.average(sites.efficiency, weights=weights),
+        "dispatch": modes[0],
+    }
+
+
+def _aggregate(sites, productions, parameters, *, demand_filename, prices_filename):
+    # Combine the production of all sites, the sites are assumed to share the demand and prices
+    data = sum(production.astype(np.float64) for production in productions)
+
+    # Run the model on the combined production with the total capacity, storage, and investment
+    return model.run_production(
+        data.production_wind,
+        data.production_pv,
+        {
+            "wind": {"capacity": sites.capacity_wind.sum()},
+            "pv": {"capacity": sites.capacity_pv.sum()},
+            "storage": _get_storage_parameters(sites),
+            "financial": {**parameters["financial"], "investment": sites.investment.sum()},
+        },
+        demand_filename=demand_filename,
+        prices_filename=prices_filename,
+    )
+
+
+def run(
+    sites,
+    *,
+    year=2018,
+    demand_filename="input/demand.csv",
+    prices_filename="input/day_ahead_prices.csv",
+    max_workers=None,
+):
+    """
+    Evaluate a portfolio of sites, each with its own KNMI file and park configuration, on a pool of
+    worker processes.
+
+    The sites are configured in the same way as the scenarios of the command line runner. Each
+    worker imports the weather files itself, so only the site configurations are sent to the
+    workers. The combined production of all sites is balanced against the demand with the combined
+    storage of the sites, and the financial metrics use the total investment and the default
+    financial parameters.
+
+    Returns:
+        Portfolio: The results of each site and the combined results
+    """
+    initargs = (year, demand_filename, prices_filename)
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers, initializer=_initialize, initargs=initargs
+    ) as executor:
+        evaluated = list(executor.map(_evaluate, sites))
+
+    names = [site.get("name", f"site_{number + 1}") for number, site in enumerate(sites)]
+    summaries = pd.DataFrame([summary for summary, _ in evaluated], index=names)
+    summaries.index.name = "name"
+    results = _aggregate(
+        summaries,
+        [production for _, production in evaluated],
+        model.default_parameters(),
+        demand_filename=demand_filename,
+        prices_filename=prices_filename,
+    )
+    return Portfolio(sites=summaries, results=results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Evaluate a portfolio of sites from a JSON or YAML file"
+    )
+    parser.add_argument("sites", help="path of the JSON or YAML file with the sites")
+    parser.add_argument("--year", type=int, default=2018)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--output", help="path of the CSV file the results are written to")
+    parser.add_argument(
+        "--hourly", help="path of the CSV file the combined hourly results are written to"
+    )
+    args = parser.parse_args()
+
+    portfolio = run(cli.load_scenarios(args.sites), year=args.year, max_workers=args.workers)
+    columns = ["capacity_wind", "capacity_pv", "power_rating", "energy_rating", "investment"]
+    totals = portfolio.sites[columns].sum()
+    summary = portfolio.sites.copy()
+    summary.loc["portfolio"] = pd.Series({**totals, **portfolio.results.summarize()})
+    if args.output:
+        summary.to_csv(args.output)
+    else:
+        print(summary.T.to_string())
+    if args.hourly:
+        os.makedirs(os.path.dirname(args.hourly) or ".", exist_ok=True)
+        portfolio.results.data.to_csv(args.hourly)
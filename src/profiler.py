@@ -0,0 +1,175 @@
+from dataclasses import dataclass, asdict, is_dataclass
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Every thread records into its own recorder, so concurrent Streamlit sessions are kept apart
+_local = threading.local()
+
+
+@dataclass
+class Span:
+    name: str
+    category: str
+    start: float
+    duration: float
+    thread: int
+    cache: str = None
+    input_size: int = None
+    memory: int = None
+
+
+def get_size(value):
+    """
+    Get the number of bytes of the data in pandas objects, arrays, and containers and dataclasses
+    of them.
+
+    Returns:
+        int: Number of bytes, other values are counted as zero bytes
+    """
+    if isinstance(value, (pd.Series, pd.DataFrame)):
+        return int(np.sum(value.memory_usage(index=True)))
+    if isinstance(value, (pd.Index, np.ndarray)):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sum(get_size(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(get_size(item) for item in value)
+    if is_dataclass(value) and not isinstance(value, type):
+        return sum(get_size(item) for item in vars(value).values())
+    return 0
+
+
+class Recorder:
+    """
+    Collection of the spans recorded during a single run of the app.
+    """
+
+    def __init__(self):
+        self.spans = []
+        self.origin = time.perf_counter()
+
+    def to_frame(self):
+        """
+        Get the recorded spans as a table.
+
+        Returns:
+            DataFrame: DataFrame with a row for each span, in the order in which they finished
+        """
+        columns = ["name", "category", "start", "duration", "cache", "input_size", "memory"]
+        frame = pd.DataFrame([asdict(span) for span in self.spans], columns=columns + ["thread"])
+        frame["start"] -= self.origin
+        return frame[columns]
+
+    def to_chrome_trace(self):
+        """
+        Convert the spans to the Chrome trace event format, which can be opened in
+        chrome://tracing or Perfetto.
+
+        Returns:
+            dict: Dictionary with the trace events
+        """
+        events = []
+        for span in self.spans:
+            arguments = {"cache": span.cache, "input_size": span.input_size, "memory": span.memory}
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": span.category,
+                    "ph": "X",
+                    "ts": (span.start - self.origin) * 10 ** 6,
+                    "dur": span.duration * 10 ** 6,
+                    "pid": os.getpid(),
+                    "tid": span.thread,
+                    "args": {key: value for key, value in arguments.items() if value is not None},
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save_chrome_trace(self, filename):
+        with open(filename, "w") as file:
+            json.dump(self.to_chrome_trace(), file)
+
+
+def start():
+    """
+    Start a new recorder for the current thread, the spans of a previous run are discarded.
+
+    Returns:
+        Recorder: The new recorder
+    """
+    _local.recorder = Recorder()
+    return _local.recorder
+
+
+def get_recorder():
+    """
+    Get the recorder of the current thread.
+
+    Returns:
+        Recorder: The recorder, or None if no recorder was started in this thread
+    """
+    return getattr(_local, "recorder", None)
+
+
+@contextlib.contextmanager
+def use(recorder):
+    """
+    Record the spans of the current thread in the given recorder, so the spans of worker threads
+    end up in the recorder of the thread that started the work.
+    """
+    previous = get_recorder()
+    _local.recorder = recorder
+    try:
+        yield recorder
+    finally:
+        _local.recorder = previous
+
+
+@contextlib.contextmanager
+def span(name, *, category="stage", inputs=None, memory=True):
+    """
+    Record the duration of a block of code in the recorder of the current thread.
+
+    The allocated memory is only recorded when tracemalloc is tracing, for example after setting
+    PYTHONTRACEMALLOC=1, since tracing slows down every allocation. The memory is traced for the
+    whole process, so it should not be recorded for blocks that run concurrently with others. The yielded dictionary can be
+    used to add the cache status of the block.
+    """
+    details = {"cache": None}
+    recorder = get_recorder()
+    if recorder is None:
+        yield details
+        return
+
+    tracing = memory and tracemalloc.is_tracing()
+    allocated = tracemalloc.get_traced_memory()[0] if tracing else None
+    start = time.perf_counter()
+    try:
+        yield details
+    finally:
+        duration = time.perf_counter() - start
+        if tracing:
+            allocated = tracemalloc.get_traced_memory()[0] - allocated
+        recorded = Span(
+            name=name,
+            category=category,
+            start=start,
+            duration=duration,
+            thread=threading.get_ident(),
+            cache=details["cache"],
+            input_size=get_size(inputs) if inputs is not None else None,
+            memory=allocated,
+        )
+        recorder.spans.append(recorded)
+
+        # Emit a structured log record, so slow stages can be found in the logs of a server
+        logger.info(json.dumps({**asdict(recorded), "start": start - recorder.origin}))
@@ -1,42 +1,73 @@
-import streamlit as st
 import pandas as pd
 import math
+import numpy as np
 import pvlib
+import atlas
+import cache
 
+# Increase the version when the solar position or decomposition model changes
+version = 1
 
-@st.experimental_memo
+# The weather columns that are used by the PV model
+columns = ["wind_speed", "temperature", "ghi"]
+
+
+@cache.memo()
 def _import_module(type):
     modules = pd.read_excel("input/modules.xlsx", index_col="Parameters")
     return modules[type]
 
 
-@st.experimental_memo
+def _to_arrays(frame):
+    return {column: frame[column].to_numpy() for column in frame}
+
+
+@cache.memo(maxsize=16)
 def _calculate_irradiance(data, latitude, longitude):
-    weather = data[["wind_speed", "temperature", "ghi"]]
-    position = pvlib.solarposition.ephemeris(data.index, latitude, longitude)
-    irradiance = pvlib.irradiance.erbs(weather.ghi, position.zenith, position.index)
+    weather = data[columns]
+
+    # The solar position only depends on the location and time, so it is stored on disk
+    position_key = cache.fingerprint(data.index, latitude, longitude, version)
+    position = cache.persist(
+        "solar_position",
+        position_key,
+        lambda: _to_arrays(
+            pvlib.solarposition.ephemeris(data.index, latitude, longitude)
+        ),
+    )
+    position = pd.DataFrame(position, index=data.index)
+
+    # The DNI and DHI also depend on the GHI
+    irradiance_key = cache.fingerprint(position_key, weather.ghi)
+    irradiance = cache.persist(
+        "irradiance",
+        irradiance_key,
+        lambda: _to_arrays(
+            pvlib.irradiance.erbs(weather.ghi, position.zenith, position.index)
+        ),
+    )
+    irradiance = pd.DataFrame(irradiance, index=data.index)
 
     return pd.concat([weather, position, irradiance], axis=1)
 
 
 def _get_ac_from_dc(power_dc, nominal_power_ac, *, efficiency_nom=0.96):
-    # Return 0 if the DC power is 0
-    if power_dc == 0:
-        return 0
+    power_dc = np.asarray(power_dc, dtype=float)
 
     # Calculate the rated DC power
     nominal_power_dc = nominal_power_ac / efficiency_nom
 
-    # Return the rated power of the inverter if the DC power is larger or equal to the rated DC power
-    if power_dc >= nominal_power_dc:
-        return nominal_power_ac
-
-    # Calculate the efficiency
-    zeta = power_dc / nominal_power_dc
+    # Calculate the efficiency, the zero DC power timesteps are replaced to prevent a division by zero
+    zeta = np.where(power_dc == 0, 1, power_dc) / nominal_power_dc
     efficiency = -0.0162 * zeta - (0.0059 / zeta) + 0.9858
 
-    # Return the efficiency of the inverter times the DC power
-    return efficiency * power_dc
+    # Return 0 if the DC power is 0, the rated power of the inverter if the DC power is larger
+    # or equal to the rated DC power, and the efficiency of the inverter times the DC power otherwise
+    return np.select(
+        [power_dc == 0, power_dc >= nominal_power_dc],
+        [0, nominal_power_ac],
+        efficiency * power_dc,
+    )
 
 
 def _calculate_production(irradiance, module, *, tilt, azimuth):
@@ -44,7 +75,7 @@ def _calculate_production(irradiance, module, *, tilt, azimuth):
     wind = irradiance.wind_speed
     temp_air = irradiance.temperature
     zenith = irradiance.zenith
-    azimuth = irradiance.azimuth
+    solar_azimuth = irradiance.azimuth
     apparent_zenith = irradiance.apparent_zenith
     dni = irradiance.dni
     ghi = irradiance.ghi
@@ -52,7 +83,7 @@ def _calculate_production(irradiance, module, *, tilt, azimuth):
 
     # Get the POA for this specific facade
     poa = pvlib.irradiance.get_total_irradiance(
-        tilt, azimuth, zenith, azimuth, dni, ghi, dhi
+        tilt, azimuth, zenith, solar_azimuth, dni, ghi, dhi
     )
 
     # Calculate the temperature of the cell
@@ -65,7 +96,7 @@ def _calculate_production(irradiance, module, *, tilt, azimuth):
     absolute_airmass = pvlib.atmosphere.get_absolute_airmass(relative_airmass)
 
     # Calculate the Angle of Incidence
-    aoi = pvlib.irradiance.aoi(tilt, azimuth, zenith, azimuth)
+    aoi = pvlib.irradiance.aoi(tilt, azimuth, zenith, solar_azimuth)
 
     # Calculate the effective irradiance
     effective_irradiance = pvlib.pvsystem.sapm_effective_irradiance(
@@ -75,56 +106,76 @@ def _calculate_production(irradiance, module, *, tilt, azimuth):
     # Calculate the performance of the cell
     performance = pvlib.pvsystem.sapm(effective_irradiance, temp_cell, module)
 
-    # Calculate the total and relative annual yield
-    return performance.p_mp.apply(_get_ac_from_dc, args=(module.Wp,))
-
+    # Calculate the AC output of the inverter
+    power_ac = _get_ac_from_dc(performance.p_mp, module.Wp)
+    return pd.Series(power_ac, index=performance.index)
 
-def ask_input(parameters):
-    st.sidebar.title("🌤️ Solar power")
 
-    # Get the capacity input
-    capacity_approx = st.sidebar.number_input(
-        label="Required solar PV power capacity (MW)",
-        value=35,
-        min_value=0,
-        max_value=60,
-        step=5,
-    )
+def get_num_panels(capacity, parameters):
+    """
+    Get the number of panels required for at least the given capacity (MW).
 
-    # Calculate the number of panels and total capacity
+    Returns:
+        int: Number of panels
+    """
     rated_power = parameters["pv"]["rated_power"] / 10 ** 6
-    num_panels = math.ceil(capacity_approx / rated_power)
-    capacity_pv = num_panels * rated_power
+    return math.ceil(capacity / rated_power)
 
-    # Show the number of installed PV panels
-    st.sidebar.caption(
-        f"{num_panels:,} PV panels will be installed for a total of {round(capacity_pv, 2)}MW"
-    )
 
-    # Get the tilt and azimuth input
-    tilt = st.sidebar.slider(
-        label="Tilt panels (°)", value=35, min_value=0, max_value=90
-    )
-    azimuth = st.sidebar.slider(
-        label="Azimuth panels (°)", value=180, min_value=0, max_value=360
-    )
+@cache.memo(maxsize=16)
+def calculate_profile(weather, latitude, longitude, tilt, azimuth):
+    """
+    Calculate the output of a single PV panel.
+
+    The profile only depends on the weather, location, and orientation of the panels, so changing
+    the number of panels does not require the profile to be recalculated.
+
+    Returns:
+        Series: Series with the average power (MW) of one panel for each timestep
+    """
+    module = _import_module("HIT")
+    irradiance = _calculate_irradiance(weather, latitude=latitude, longitude=longitude)
+    output = _calculate_production(irradiance, module, tilt=tilt, azimuth=azimuth)
+    return output / 10 ** 6
 
-    # Add the parameters
-    parameters["pv"]["num_panels"] = num_panels
-    parameters["pv"]["capacity"] = capacity_pv
-    parameters["pv"]["tilt"] = tilt
-    parameters["pv"]["azimuth"] = azimuth
+
+def build_atlas(weather, latitude, longitude, *, tilts, azimuths, filename):
+    """
+    Calculate the output of a single PV panel for every combination of tilts and azimuths and
+    store them in an atlas, so `calculate` can read them instead of running pvlib again.
+    """
+    module = _import_module("HIT")
+    irradiance = _calculate_irradiance(weather, latitude=latitude, longitude=longitude)
+
+    profiles = atlas.create(
+        filename, weather, latitude, longitude, tilts=tilts, azimuths=azimuths
+    )
+    for tilt_index, tilt in enumerate(tilts):
+        for azimuth_index, azimuth in enumerate(azimuths):
+            output = _calculate_production(
+                irradiance, module, tilt=tilt, azimuth=azimuth
+            )
+            profiles[tilt_index, azimuth_index] = output / 10 ** 6
+    atlas.save(filename, profiles)
 
 
-@st.experimental_memo
 def calculate(data, parameters):
+    weather = cache.select(data, columns)
     latitude = parameters["location"]["lat"]
     longitude = parameters["location"]["lon"]
     tilt = parameters["pv"]["tilt"]
     azimuth = parameters["pv"]["azimuth"]
-    num_panels = parameters["pv"]["num_panels"]
 
-    module = _import_module("HIT")
-    irradiance = _calculate_irradiance(data, latitude=latitude, longitude=longitude)
-    output = _calculate_production(irradiance, module, tilt=tilt, azimuth=azimuth)
-    return output * num_panels / 10 ** 6
+    # Read the profile from the atlas and only run the PV model if the atlas does not cover it
+    profile = atlas.lookup(weather, latitude, longitude, tilt, azimuth)
+    if profile is None:
+        profile = calculate_profile(
+            weather,
+            latitude=latitude,
+            longitude=longitude,
+            tilt=tilt,
+            azimuth=azimuth,
+        )
+
+    # Scale the output of a single panel to the whole PV park
+    return profile * parameters["pv"]["num_panels"]
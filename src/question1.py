@@ -1,6 +1,80 @@
 import streamlit as st
-import wind
 import pv
+import timeseries
+import wind
+
+
+def _ask_wind_input(parameters):
+    st.sidebar.title("💨 Wind power")
+    capacity_wind_approx = st.sidebar.number_input(
+        label="Required wind power capacity (MW)",
+        value=25,
+        min_value=0,
+        max_value=60,
+        step=5,
+    )
+
+    rated_power = parameters["wind"]["rated_power"]
+    num_turbines = wind.get_num_turbines(capacity_wind_approx, parameters)
+    capacity_wind = num_turbines * rated_power
+
+    # Show the number of installed turbines
+    st.sidebar.caption(
+        f"{num_turbines} turbines will be installed for a total of {capacity_wind}MW"
+    )
+
+    # Place the turbines on a grid to include the wake losses
+    wakes = st.sidebar.checkbox("Include wake losses")
+
+    # Add the parameters
+    parameters["wind"]["num_turbines"] = num_turbines
+    parameters["wind"]["capacity"] = capacity_wind
+    if wakes:
+        parameters["wind"]["layout"] = wind.get_layout(
+            num_turbines, rotor_diameter=parameters["wind"]["rotor_diameter"]
+        )
+
+
+def _ask_pv_input(parameters):
+    st.sidebar.title("🌤️ Solar power")
+
+    # Get the capacity input
+    capacity_approx = st.sidebar.number_input(
+        label="Required solar PV power capacity (MW)",
+        value=35,
+        min_value=0,
+        max_value=60,
+        step=5,
+    )
+
+    # Calculate the number of panels and total capacity
+    rated_power = parameters["pv"]["rated_power"] / 10 ** 6
+    num_panels = pv.get_num_panels(capacity_approx, parameters)
+    capacity_pv = num_panels * rated_power
+
+    # Show the number of installed PV panels
+    st.sidebar.caption(
+        f"{num_panels:,} PV panels will be installed for a total of {round(capacity_pv, 2)}MW"
+    )
+
+    # Get the tilt and azimuth input
+    tilt = st.sidebar.slider(
+        label="Tilt panels (°)", value=35, min_value=0, max_value=90
+    )
+    azimuth = st.sidebar.slider(
+        label="Azimuth panels (°)", value=180, min_value=0, max_value=360
+    )
+
+    # Add the parameters
+    parameters["pv"]["num_panels"] = num_panels
+    parameters["pv"]["capacity"] = capacity_pv
+    parameters["pv"]["tilt"] = tilt
+    parameters["pv"]["azimuth"] = azimuth
+
+
+def ask_input(parameters):
+    _ask_wind_input(parameters)
+    _ask_pv_input(parameters)
 
 
 def _explain(parameters):
@@ -16,7 +90,7 @@ def _explain(parameters):
     st.markdown(
         """
         The hourly wind output is calculated by first calculating the wind speed at hub height, power in the wind, and interpolating the power coefficient[1]. These can
-        than be used to calculate the power generated by the turbines for each hour in the year.
+        than be used to calculate the power generated by the turbines for each timestep in the year.
     """
     )
     st.caption(
@@ -31,9 +105,21 @@ def _explain(parameters):
     )
 
     st.latex(
-        r"E_{elec,wind} = \sum_{t=1}^{8760} N_{turbines} \times C_{p,t} \times P_{wind,t}"
+        r"E_{elec,wind} = \sum_{t=1}^{T} N_{turbines} \times C_{p,t} \times P_{wind,t} \times \Delta T"
     )
 
+    if parameters["wind"].get("layout") is not None:
+        st.markdown(
+            """
+            With wake losses enabled, the turbines are placed on a square grid with a spacing of seven rotor diameters. The wind speed at each turbine
+            is reduced by the wakes of the turbines upwind of it, according to the Jensen (Park) model and the hourly wind direction. The thrust coefficient
+            of the turbines is derived from their power coefficient with the actuator disc theory.
+        """
+        )
+        st.latex(
+            r"\frac{\Delta V_j}{V_{hub}} = \left(1 - \sqrt{1 - C_T}\right) \sqrt{\sum_{i} \left(\frac{A_{overlap,ij}}{A_{rotor}} \left(\frac{R}{R + k x_{ij}}\right)^2\right)^2}"
+        )
+
     st.subheader("Solar PV power")
     st.markdown(
         """
@@ -51,16 +137,10 @@ def _explain(parameters):
 def calculate(data, parameters):
     st.header("Question 1")
 
-    # Get the input parameters
-    wind.ask_input(parameters)
-    pv.ask_input(parameters)
-
-    # Calculate the annual wind and solar PV production
-    data["production_wind"] = wind.calculate(data, parameters)
-    data["production_pv"] = pv.calculate(data, parameters)
-
     # Show the total annually generated wind and solar PV production
     col1, col2 = st.columns(2)
-    col1.metric("Wind production", f"{int(data.production_wind.sum() / 1000)} GWh/year")
-    col2.metric("PV production", f"{int(data.production_pv.sum() / 1000)} GWh/year")
+    production_wind = timeseries.get_energy(data.production_wind)
+    production_pv = timeseries.get_energy(data.production_pv)
+    col1.metric("Wind production", f"{int(production_wind / 1000)} GWh/year")
+    col2.metric("PV production", f"{int(production_pv / 1000)} GWh/year")
     _explain(parameters)
@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
-from matplotlib import pyplot as plt
+import aggregates
+import cache
 
 table_explanation = """
         The table below shows the statistical indicators for the produced energy for each energy source. The checkbox allows you to switch between absolute and relative values.
@@ -23,56 +24,55 @@ def _create_annual_plot(data):
     label = "Window of the rolling average (days)"
     window = st.slider(label, value=30, min_value=1, max_value=60)
 
-    # Prepare the plot data
-    plot_data = data[["production_wind", "production_pv"]]
-    plot_data["production_total"] = data.production_wind + data.production_pv
-
-    # Create the plot
-    fig, ax = plt.subplots(figsize=(10, 4))
-    ax.plot(plot_data.resample("D").mean().rolling(window=window).mean())
-    ax.set_ylabel("Power (MW)")
-    ax.legend(["Wind", "Solar PV", "Total"])
+    # The daily totals only change with the production, so moving the slider only takes the prefix
+    # sums. The selection of the frozen results is memoized without hashing the production again.
+    daily = aggregates.get_daily(cache.select(data, ["production_wind", "production_pv"]))
+    average = aggregates.rolling_mean(daily, window)
+    power = pd.DataFrame(
+        {
+            "Wind": average.production_wind,
+            "Solar PV": average.production_pv,
+            "Total": average.production_wind + average.production_pv,
+        }
+    )
 
-    st.pyplot(fig)
+    # Plot the daily values, which are much lighter to send to the browser than the timesteps
+    st.line_chart(power)
+    st.caption("Average power (MW)")
 
 
 def _create_table(data, parameters):
-    # Define shorter variables
-    production_wind = data.production_wind
-    capacity_wind = parameters["wind"]["capacity"]
-    production_pv = data.production_pv
-    capacity_pv = parameters["pv"]["capacity"]
-    production_total = production_wind + production_pv
-    capacity_total = capacity_wind + capacity_pv
+    # Summarize all sources in a single pass, the combined production is only added per chunk
+    summaries = aggregates.get_statistics(
+        cache.select(data, ["production_wind", "production_pv"])
+    )
+    capacities = {
+        "wind": parameters["wind"]["capacity"],
+        "pv": parameters["pv"]["capacity"],
+        "total": parameters["wind"]["capacity"] + parameters["pv"]["capacity"],
+    }
 
     # Create a table with the statistical values
     st.markdown(table_explanation)
     relative = st.checkbox("Show values relative to installed capacity")
     unit = "%" if relative else "MW"
 
+    def get_metrics(name):
+        summary = summaries[name]
+        values = [
+            summary.minimum,
+            summary.mean,
+            summary.maximum,
+            summary.std(),
+        ]
+        return [_calculate_metric(value, capacities[name], relative) for value in values]
+
     st.table(
         pd.DataFrame(
             {
-                "Wind": [
-                    _calculate_metric(production_wind.min(), capacity_wind, relative),
-                    _calculate_metric(production_wind.mean(), capacity_wind, relative),
-                    _calculate_metric(production_wind.max(), capacity_wind, relative),
-                    _calculate_metric(production_wind.std(), capacity_wind, relative),
-                ],
-                "Solar": [
-                    _calculate_metric(production_pv.min(), capacity_pv, relative),
-                    _calculate_metric(production_pv.mean(), capacity_pv, relative),
-                    _calculate_metric(production_pv.max(), capacity_pv, relative),
-                    _calculate_metric(production_pv.std(), capacity_pv, relative),
-                ],
-                "Combined": [
-                    _calculate_metric(production_total.min(), capacity_total, relative),
-                    _calculate_metric(
-                        production_total.mean(), capacity_total, relative
-                    ),
-                    _calculate_metric(production_total.max(), capacity_total, relative),
-                    _calculate_metric(production_total.std(), capacity_total, relative),
-                ],
+                "Wind": get_metrics("wind"),
+                "Solar": get_metrics("pv"),
+                "Combined": get_metrics("total"),
             },
             columns=["Wind", "Solar", "Combined"],
             index=[
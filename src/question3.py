@@ -1,10 +1,11 @@
 import streamlit as st
+import timeseries
 
-cf_explanation = "The capacity factor for wind en solar PV is calculated by dividing the sum of the output by their respective capacity and total number of hours (8760) per year."
-cf_formula = r"Capacity\ factor_{source} = \frac{\sum_{t=1}^{8760} E_{source,t}}{E_{source,max} \times 8760}"
+cf_explanation = "The capacity factor for wind en solar PV is calculated by dividing the sum of the output by their respective capacity and total number of hours per year."
+cf_formula = r"Capacity\ factor_{source} = \frac{\sum_{t=1}^{T} P_{source,t} \times \Delta T}{P_{source,max} \times T \times \Delta T}"
 
 flh_explanation = "The full load hours are calculated by almost the same formula as the capacity factor, but instead of dividing the sum of the output by the capacity and number of hours in a year, it is only divided by the sum of the output."
-flh_formula = r"Full\ load\ hours_{source} = \frac{\sum_{t=1}^{8760} E_{source,t}}{E_{source,max}} = 8760 \times Capacity\ factor_{source}"
+flh_formula = r"Full\ load\ hours_{source} = \frac{\sum_{t=1}^{T} P_{source,t} \times \Delta T}{P_{source,max}} = T \times \Delta T \times Capacity\ factor_{source}"
 
 
 def calculate(data, parameters):
@@ -14,10 +15,13 @@ def calculate(data, parameters):
     capacity_pv = parameters["pv"]["capacity"]
     capacity_total = capacity_wind + capacity_pv
 
-    cf_wind = data.production_wind.sum() / (capacity_wind * 8760)
-    cf_pv = data.production_pv.sum() / (capacity_pv * 8760)
-    production_total = data.production_wind.sum() + data.production_pv.sum()
-    cf_total = production_total / (capacity_total * 8760)
+    # Use the number of hours in the data, since the timesteps are not necessarily hours
+    hours = len(data) * timeseries.get_timestep(data.index)
+    production_wind = timeseries.get_energy(data.production_wind)
+    production_pv = timeseries.get_energy(data.production_pv)
+    cf_wind = production_wind / (capacity_wind * hours)
+    cf_pv = production_pv / (capacity_pv * hours)
+    cf_total = (production_wind + production_pv) / (capacity_total * hours)
 
     # Capacity factor
     st.subheader("Capacity factor")
@@ -32,9 +36,9 @@ def calculate(data, parameters):
     # Full load
     st.subheader("Full load hours")
     col1, col2, col3 = st.columns(3)
-    col1.metric("Wind", f"{int(cf_wind * 8760)} hours")
-    col2.metric("Solar PV", f"{int(cf_pv * 8760)} hours")
-    col3.metric("Combined", f"{int(cf_total * 8760)} hours")
+    col1.metric("Wind", f"{int(cf_wind * hours)} hours")
+    col2.metric("Solar PV", f"{int(cf_pv * hours)} hours")
+    col3.metric("Combined", f"{int(cf_total * hours)} hours")
 
     st.markdown(flh_explanation)
     st.latex(flh_formula)
@@ -1,17 +1,7 @@
 import streamlit as st
-import pandas as pd
 
 
-def _import_day_ahead_prices(data):
-    # Drop the first line, since 2018-01-01T23:30:00 is missing from data
-    demand = pd.read_csv("input/day_ahead_prices.csv", header=None, skiprows=2)
-    demand.columns = ["date", "day_ahead_price"]
-    demand.index = data.index
-    data["day_ahead_price"] = demand.day_ahead_price
-    data["revenue"] = data.day_ahead_price * (data.production_wind + data.production_pv)
-
-
-def _ask_input(parameters):
+def ask_input(parameters):
     st.sidebar.title("💸 Financial")
 
     parameters["financial"]["sde_enabled"] = st.sidebar.checkbox("SDE++")
@@ -35,7 +25,8 @@ def _explain():
         and a technical availability of 98% [3] are assumed for both the wind and solar PV installation.
 
         The payback period is calculated by dividing the initial investment by the annual revenue, minus the operations and management costs. The annual
-        revenue is the sum of the electricity price multiplied by the electricity generated for each time period. When
+        revenue is the sum of the electricity price multiplied by the electricity sold for each time period, which is the electricity generated
+        minus the electricity the battery takes from the grid, plus the electricity it supplies. When
         SDE++ is enabled a fixed electricity price of €58 per MWh is used instead of the day ahead price.
 
         For both the electricity generation and electricity price we assume future years will be exactly the same
@@ -55,36 +46,20 @@ def _explain():
     )
 
     st.latex(
-        r"pay\ back\ period = \frac{cost_{investment}}{\sum_{t=1}^{8760} price_{electricity,t}(E_{wind,t} + E_{pv,t}) - cost_{OM}}"
+        r"pay\ back\ period = \frac{cost_{investment}}{\sum_{t=1}^{T} price_{electricity,t}(P_{wind,t} + P_{pv,t}) \Delta T - cost_{OM}}"
     )
 
     st.latex(
-        r"LCOE = \frac{\frac{discount\ rate}{1 - (1 + discount\ rate)^{-n}} \times cost_{investment} + cost_{OM}}{\sum_{t=1}^{8760} E_{wind,t} + E_{pv,t}}"
+        r"LCOE = \frac{\frac{discount\ rate}{1 - (1 + discount\ rate)^{-n}} \times cost_{investment} + cost_{OM}}{\sum_{t=1}^{T} (P_{wind,t} + P_{pv,t}) \Delta T}"
     )
 
 
-def calculate(data, parameters):
+def calculate(results, parameters):
     st.header("Question 7")
 
-    # Import the day ahead prices and get the input parameters
-    _import_day_ahead_prices(data)
-    _ask_input(parameters)
-
-    # Calculate the payback time
-    investment = parameters["financial"]["investment"] * 10 ** 6
-    sde_price = parameters["financial"]["sde_price"]
-    electricity_production = data.production_wind.sum() + data.production_pv.sum()
-    pbp = investment / data.revenue.sum()
-    pbp_sde = investment / (electricity_production * sde_price)
-
-    # Calculate the LCOE
-    discount_rate = parameters["financial"]["discount_rate"]
-    deprecation_period = parameters["financial"]["deprecation_period"]
-    capital_recovery_factor = discount_rate / (
-        1 - (1 + discount_rate) ** -deprecation_period
-    )
-    om_costs = 0
-    lcoe = (capital_recovery_factor * investment + om_costs) / electricity_production
+    pbp = results.payback_period
+    pbp_sde = results.payback_period_sde
+    lcoe = results.lcoe
 
     sde_enabled = parameters["financial"]["sde_enabled"]
     col1, col2 = st.columns(2)
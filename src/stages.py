@@ -0,0 +1,211 @@
+from dataclasses import dataclass
+import collections
+import concurrent.futures
+import functools
+import multiprocessing
+import os
+import threading
+import cache
+import profiler
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    function: object
+    inputs: tuple
+    outputs: tuple
+    # Stages that hold the GIL, such as plain Python loops, run in a worker process instead of a
+    # thread, so the function, inputs, and outputs should be picklable
+    process: bool = False
+
+
+def _sort(stages):
+    # Order the stages so every stage comes after the stages that produce its inputs
+    producers = {output: stage for stage in stages for output in stage.outputs}
+    ordered = []
+    visiting = set()
+
+    def visit(stage):
+        if stage in ordered:
+            return
+        if stage.name in visiting:
+            raise ValueError(f"Stage '{stage.name}' depends on itself")
+        visiting.add(stage.name)
+        for name in stage.inputs:
+            if name in producers:
+                visit(producers[name])
+        visiting.remove(stage.name)
+        ordered.append(stage)
+
+    for stage in stages:
+        visit(stage)
+    return ordered
+
+
+class Graph:
+    """
+    Directed acyclic graph of stages with declared inputs and outputs.
+
+    The results of each stage are cached with a key based on the fingerprints of its inputs, so a
+    changed input only invalidates the stages downstream of it. The sources are fingerprinted once
+    per run, which only takes microseconds for frozen sources. Stages that do not depend on each
+    other run concurrently on a pool of threads, since numpy and pvlib release the GIL for most of
+    their work and the inputs are shared without copying them. The stages that hold the GIL run
+    on a pool of max_processes worker processes, which is started on first use. They run on the
+    threads as well if max_processes is 0 or the graph runs in a worker process itself.
+    """
+
+    def __init__(self, stages, *, name="graph", maxsize=8, max_workers=4, max_processes=2):
+        self.stages = _sort(stages)
+        self.maxsize = maxsize
+        self.max_workers = max_workers
+        self.max_processes = max_processes
+        self._processes = None
+        self._processes_pid = None
+        self._results = {stage.name: collections.OrderedDict() for stage in stages}
+        self._statistics = {
+            stage.name: {"hits": 0, "misses": 0, "evictions": 0} for stage in stages
+        }
+        self._lock = threading.Lock()
+        for stage in stages:
+            cache.register(f"{name}.{stage.name}", functools.partial(self._get_info, stage.name))
+
+    def _get_info(self, name):
+        with self._lock:
+            return {
+                **self._statistics[name],
+                "size": len(self._results[name]),
+                "maxsize": self.maxsize,
+            }
+
+    def _get_cached(self, stage, key):
+        with self._lock:
+            results = self._results[stage.name]
+            if key in results:
+                self._statistics[stage.name]["hits"] += 1
+                results.move_to_end(key)
+                return results[key]
+            self._statistics[stage.name]["misses"] += 1
+        return None
+
+    def _set_cached(self, stage, key, outputs):
+        with self._lock:
+            results = self._results[stage.name]
+            results[key] = outputs
+            if len(results) > self.maxsize:
+                results.popitem(last=False)
+                self._statistics[stage.name]["evictions"] += 1
+
+    def _in_process(self, stage):
+        # A worker process, for example of a portfolio, runs all stages on its threads, since the
+        # work is already spread over the processes
+        return (
+            stage.process
+            and self.max_processes > 0
+            and multiprocessing.parent_process() is None
+        )
+
+    def _start_processes(self):
+        # The workers are started before the stages run on the threads, since forking while
+        # another thread holds a lock copies the lock in its locked state. A forked process cannot
+        # use the pool of its parent, so it starts its own pool.
+        with self._lock:
+            if self._processes is None or self._processes_pid != os.getpid():
+                self._processes = concurrent.futures.ProcessPoolExecutor(self.max_processes)
+                self._processes_pid = os.getpid()
+                self._processes.submit(int).result()
+            return self._processes
+
+    def _run_stage(self, stage, key, inputs, recorder):
+        # The span is recorded in the recorder of the thread that started the run, the allocated
+        # memory is process wide so it is only recorded if the stages run one at a time in this
+        # process
+        with profiler.use(recorder), profiler.span(
+            stage.name,
+            inputs=inputs,
+            memory=self.max_workers == 1 and not self._in_process(stage),
+        ) as details:
+            outputs = self._get_cached(stage, key)
+            details["cache"] = "hit" if outputs is not None else "miss"
+            if outputs is None:
+                if self._in_process(stage):
+                    future = self._start_processes().submit(stage.function, **inputs)
+                    outputs = future.result()
+                else:
+                    outputs = stage.function(**inputs)
+                if len(stage.outputs) == 1:
+                    outputs = (outputs,)
+                self._set_cached(stage, key, outputs)
+        return details["cache"], outputs
+
+    def run(self, sources):
+        """
+        Run all stages for the given sources, reusing the cached results of unchanged stages.
+
+        Every stage starts as soon as all of its inputs are available. The outputs are merged in
+        the order of the stages, so the result does not depend on which stage finishes first. A
+        stage of which all outputs are given as sources is skipped, so intermediate results can
+        be passed in instead of being calculated. The cache status is returned for each run, since
+        a graph can be shared by concurrent callers.
+
+        Returns:
+            tuple: Dictionary with the sources and the outputs of all stages, and dictionary with the cache status (hit or miss) of each stage that ran
+        """
+        keys = {name: cache.fingerprint(value) for name, value in sources.items()}
+        stages = [
+            stage
+            for stage in self.stages
+            if not all(name in sources for name in stage.outputs)
+        ]
+
+        # The key of a stage only changes if the key of one of its inputs changes, so all keys are
+        # known before any stage runs
+        stage_keys = {}
+        for stage in stages:
+            missing = [name for name in stage.inputs if name not in keys]
+            if missing:
+                raise KeyError(f"Stage '{stage.name}' is missing the inputs {missing}")
+            stage_keys[stage.name] = cache.fingerprint(
+                stage.name, [keys[name] for name in stage.inputs]
+            )
+            for name in stage.outputs:
+                keys[name] = cache.fingerprint(stage_keys[stage.name], name)
+
+        if any(self._in_process(stage) for stage in stages):
+            self._start_processes()
+
+        values = dict(sources)
+        results = {}
+        remaining = list(stages)
+        running = {}
+        recorder = profiler.get_recorder()
+        with concurrent.futures.ThreadPoolExecutor(self.max_workers) as executor:
+            while remaining or running:
+                # Start every stage of which all inputs are available
+                ready = [
+                    candidate
+                    for candidate in remaining
+                    if all(name in values for name in candidate.inputs)
+                ]
+                for stage in ready:
+                    remaining.remove(stage)
+                    inputs = {name: values[name] for name in stage.inputs}
+                    future = executor.submit(
+                        self._run_stage, stage, stage_keys[stage.name], inputs, recorder
+                    )
+                    running[future] = stage
+
+                done, _ = concurrent.futures.wait(
+                    running, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    stage = running.pop(future)
+                    results[stage.name] = future.result()
+                    values.update(zip(stage.outputs, results[stage.name][1]))
+
+        values = dict(sources)
+        for stage in stages:
+            values.update(zip(stage.outputs, results[stage.name][1]))
+        statuses = {stage.name: results[stage.name][0] for stage in stages}
+        return values, statuses
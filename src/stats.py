@@ -0,0 +1,127 @@
+import math
+import numpy as np
+
+
+class Summary:
+    """
+    Single pass summary of a series of values, which can be updated one chunk at a time.
+
+    The mean and variance are updated with the parallel variant of Welford's algorithm, and the
+    percentiles are estimated from a sketch with at most the given number of weighted centroids.
+    Missing values are ignored, like pandas does.
+    """
+
+    def __init__(self, *, max_centroids=1000):
+        self.count = 0
+        self.mean = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.max_centroids = max_centroids
+        self._m2 = 0.0
+        self._centroids = np.empty(0)
+        self._weights = np.empty(0)
+
+    def update(self, values):
+        """
+        Add a chunk of values to the summary.
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+
+        # Combine the mean and sum of squared differences of the chunk with the previous ones
+        count = len(values)
+        mean = values.mean()
+        m2 = np.sum((values - mean) ** 2)
+        delta = mean - self.mean
+        total = self.count + count
+        self.mean += delta * count / total
+        self._m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+
+        self.minimum = min(self.minimum, values.min())
+        self.maximum = max(self.maximum, values.max())
+        self._add_centroids(np.sort(values), np.ones(count))
+
+    def merge(self, other):
+        """
+        Add the values of another summary to this summary.
+        """
+        if other.count == 0:
+            return
+        delta = other.mean - self.mean
+        total = self.count + other.count
+        self.mean += delta * other.count / total
+        self._m2 += other._m2 + delta ** 2 * self.count * other.count / total
+        self.count = total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        self._add_centroids(other._centroids, other._weights)
+
+    def _add_centroids(self, centroids, weights):
+        # Merge the sorted new centroids into the sorted centroids of the sketch, which only takes
+        # a binary search for each new centroid instead of sorting all centroids again
+        positions = np.searchsorted(self._centroids, centroids, side="right")
+        positions += np.arange(len(centroids))
+        is_new = np.zeros(len(self._centroids) + len(centroids), dtype=bool)
+        is_new[positions] = True
+        merged_centroids = np.empty(len(is_new))
+        merged_weights = np.empty(len(is_new))
+        merged_centroids[is_new], merged_weights[is_new] = centroids, weights
+        merged_centroids[~is_new], merged_weights[~is_new] = self._centroids, self._weights
+        centroids, weights = merged_centroids, merged_weights
+
+        # Compress the sorted centroids into groups of about the same total weight
+        if len(centroids) > self.max_centroids:
+            cumulative = np.cumsum(weights) - weights
+            groups = np.floor(cumulative / cumulative[-1] * self.max_centroids).astype(int)
+            starts = np.flatnonzero(np.diff(groups, prepend=-1))
+            group_weights = np.add.reduceat(weights, starts)
+            centroids = np.add.reduceat(centroids * weights, starts) / group_weights
+            weights = group_weights
+
+        self._centroids, self._weights = centroids, weights
+
+    def variance(self, *, ddof=1):
+        """
+        Returns:
+            float: Variance of the values, with the same default degrees of freedom as pandas
+        """
+        if self.count <= ddof:
+            return math.nan
+        return self._m2 / (self.count - ddof)
+
+    def std(self, *, ddof=1):
+        """
+        Returns:
+            float: Standard deviation of the values
+        """
+        return math.sqrt(self.variance(ddof=ddof))
+
+    def quantile(self, q):
+        """
+        Estimate a quantile from the sketch, the minimum and maximum are exact.
+
+        Returns:
+            float: Estimated value below which the given share of the values lies
+        """
+        if self.count == 0:
+            return math.nan
+
+        # Every centroid represents the middle of its weight
+        ranks = np.cumsum(self._weights) - self._weights / 2
+        ranks = np.concatenate([[0], ranks, [self.count]])
+        values = np.concatenate([[self.minimum], self._centroids, [self.maximum]])
+        return float(np.interp(q * self.count, ranks, values))
+
+
+def iterate_chunks(frame, chunksize=2 ** 16):
+    """
+    Split a DataFrame into chunks of rows, without copying the data.
+
+    Returns:
+        iterator: Iterator over the chunks
+    """
+    for start in range(0, len(frame), chunksize):
+        yield frame.iloc[start : start + chunksize]
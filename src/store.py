@@ -0,0 +1,195 @@
+import collections
+import concurrent.futures
+import contextlib
+import numbers
+import os
+import pickle
+import sqlite3
+import threading
+import numpy as np
+import cache
+import profiler
+
+# Number of bytes of the results that are kept in memory by the shared store
+max_bytes = 512 * 2 ** 20
+
+# Path of the SQLite database of the shared store, which keeps the results between restarts
+filename = None
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def _normalize(value):
+    # Equal parameters get the same key, whether they were entered as int, float, or numpy value
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, numbers.Real):
+        return float(value)
+    return value
+
+
+def get_key(*values):
+    """
+    Create the key of a scenario from its inputs, the filenames of which should be passed to
+    get_file_key so a changed file gives a new key.
+
+    Returns:
+        str: Key of the scenario
+    """
+    return cache.fingerprint(*[_normalize(value) for value in values])
+
+
+def get_file_key(filename):
+    """
+    Identify a file by its path, modification time, and size.
+
+    Returns:
+        tuple: Path, modification time (ns), and size (bytes) of the file
+    """
+    status = os.stat(filename)
+    return os.path.abspath(filename), status.st_mtime_ns, status.st_size
+
+
+class Store:
+    """
+    Thread safe store of results, which are shared between all sessions of the app.
+
+    The results are kept in memory in an LRU cache that is bounded by the number of bytes of the
+    results. A result that is requested again while it is being calculated is only calculated
+    once, and the other callers wait for it. With a filename the results are also kept in a SQLite
+    database, so they survive a restart. The results are shared and should not be mutated.
+    """
+
+    def __init__(self, *, max_bytes=max_bytes, filename=None):
+        self.max_bytes = max_bytes
+        self.filename = filename
+        self._results = collections.OrderedDict()
+        self._sizes = {}
+        self._size = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._statistics = {"hits": 0, "misses": 0, "evictions": 0, "waits": 0, "disk_hits": 0}
+        if filename:
+            with self._connect() as connection, connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value BLOB)"
+                )
+
+    def _connect(self):
+        # Every call uses its own connection, as connections cannot be shared between threads
+        return contextlib.closing(sqlite3.connect(self.filename, timeout=60))
+
+    def _load(self, key):
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT value FROM results WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return False, None
+        return True, pickle.loads(row[0])
+
+    def _save(self, key, value):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._connect() as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)", (key, blob)
+            )
+
+    def _add(self, key, value):
+        # Results that are larger than the store on their own are not kept in memory
+        size = profiler.get_size(value)
+        if size > self.max_bytes:
+            return
+        self._results[key] = value
+        self._sizes[key] = size
+        self._size += size
+        while self._size > self.max_bytes:
+            oldest, _ = self._results.popitem(last=False)
+            self._size -= self._sizes.pop(oldest)
+            self._statistics["evictions"] += 1
+
+    def get(self, key, calculate):
+        """
+        Get the result of a key from memory or disk, or calculate it if it is not stored yet.
+
+        Returns:
+            object: The result of the key
+        """
+        with self._lock:
+            if key in self._results:
+                self._statistics["hits"] += 1
+                self._results.move_to_end(key)
+                return self._results[key]
+
+            # Wait for the result if it is already being calculated by another caller
+            waiting = key in self._pending
+            if waiting:
+                self._statistics["waits"] += 1
+                future = self._pending[key]
+            else:
+                self._statistics["misses"] += 1
+                future = self._pending[key] = concurrent.futures.Future()
+        if waiting:
+            return future.result()
+
+        try:
+            found, value = self._load(key) if self.filename else (False, None)
+            if not found:
+                value = calculate()
+                if self.filename:
+                    self._save(key, value)
+        except BaseException as error:
+            with self._lock:
+                del self._pending[key]
+            future.set_exception(error)
+            raise
+
+        with self._lock:
+            self._statistics["disk_hits"] += found
+            self._add(key, value)
+            del self._pending[key]
+        future.set_result(value)
+        return value
+
+    def clear(self):
+        """
+        Remove all results from memory, the results on disk are kept.
+        """
+        with self._lock:
+            self._results.clear()
+            self._sizes.clear()
+            self._size = 0
+
+    def cache_info(self):
+        """
+        Returns:
+            dict: Dictionary with the number of hits, misses, evictions, waits for results that were being calculated, and results loaded from disk, and the number and bytes of the results in memory
+        """
+        with self._lock:
+            return {
+                **self._statistics,
+                "size": len(self._results),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+            }
+
+
+def get_store():
+    """
+    Get the store that is shared by all threads of the process, which is created with the
+    max_bytes and filename of this module on first use.
+
+    Returns:
+        Store: The shared store
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = Store(max_bytes=max_bytes, filename=filename)
+            cache.register("store", _store.cache_info)
+        return _store
@@ -0,0 +1,202 @@
+import os
+import numpy as np
+import pandas as pd
+import cache
+import entsoe
+
+
+def get_timestep(index):
+    """
+    Get the length of the timesteps of a datetime index.
+
+    Returns:
+        float: Length of a timestep (hours), one hour if the index has less than two timesteps
+    """
+    if len(index) < 2:
+        return 1.0
+    return float(np.median(np.diff(_to_nanoseconds(index)))) / pd.Timedelta(hours=1).value
+
+
+def get_energy(power):
+    """
+    Get the total energy of a series with the average power of each timestep.
+
+    Returns:
+        float64: Total energy (MWh)
+    """
+    # Sum in double precision, since the data can be stored as float32
+    values = np.asarray(power, dtype=np.float64)
+    return np.nansum(values) * get_timestep(power.index)
+
+
+def get_calendar_days(index):
+    """
+    Get the day of a year of 365 days of each timestamp, so a profile of a single year can be
+    repeated for other years by calendar date. February 29 gets the day of February 28, and the
+    later days of a leap year keep their calendar date.
+
+    Returns:
+        ndarray: Day of the year of each timestamp, from 0 to 364
+    """
+    day = index.dayofyear.to_numpy() - 1
+    return np.where(index.is_leap_year & (day >= 59), day - 1, day)
+
+
+def resample_weather(weather, frequency):
+    """
+    Resample hourly weather data to a shorter timestep. The wind speed, temperature, irradiance,
+    and air pressure are interpolated linearly, while the wind direction of the hour is repeated.
+
+    Returns:
+        DataFrame: DataFrame with the weather data at the middle of each new timestep
+    """
+    step = pd.Timedelta(frequency)
+    hour = pd.Timedelta(hours=1)
+    if hour % step:
+        raise ValueError(f"An hour is not a multiple of the timestep {frequency}")
+    steps_per_hour = hour // step
+
+    # The timestamps are in the middle of each hour, so the new timesteps cover the same period
+    start = weather.index[0] - hour / 2 + step / 2
+    index = pd.date_range(start, periods=len(weather) * steps_per_hour, freq=step)
+    index.name = weather.index.name
+
+    resampled = {}
+    for column in weather:
+        values = weather[column].to_numpy()
+        if column == "wind_direction":
+            resampled[column] = np.repeat(values, steps_per_hour)
+        else:
+            resampled[column] = np.interp(index.asi8, weather.index.asi8, values)
+    return pd.DataFrame(resampled, index=index)
+
+
+def align(start, end, values, index):
+    """
+    Average a series of time periods over the timesteps of an index, of which the timestamps are
+    in the middle of each timestep. Shorter periods are averaged and longer periods are repeated,
+    so series of any resolution can be combined with the weather data. Missing values and gaps are
+    left out of the average, and timesteps without any data are missing.
+
+    Returns:
+        ndarray: Average value of each timestep
+    """
+    start = np.asarray(start, dtype="datetime64[ns]").astype(np.int64)
+    end = np.asarray(end, dtype="datetime64[ns]").astype(np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    order = np.argsort(start, kind="stable")
+    start, end, values = start[order], end[order], values[order]
+
+    # The integral of the values and the covered time are piecewise linear between the start and
+    # end of the periods, so they can be interpolated at the bounds of the timesteps
+    exists = ~np.isnan(values)
+    duration = ((end - start) * exists).astype(np.float64)
+    integrals = np.where(exists, values, 0) * duration
+    bounds = np.column_stack([start, end]).ravel()
+
+    def integrate(increments, lower, upper):
+        cumulative = np.cumsum(increments)
+        points = np.column_stack([cumulative - increments, cumulative]).ravel()
+        return np.interp(upper, bounds, points) - np.interp(lower, bounds, points)
+
+    step = get_timestep(index) * pd.Timedelta(hours=1).value
+    times = _to_nanoseconds(_to_utc(index))
+    lower, upper = times - step / 2, times + step / 2
+    total = integrate(integrals, lower, upper)
+    length = integrate(duration, lower, upper)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        average = np.where(length > 0, total / length, np.nan)
+
+    # Repeat the value of the period exactly if a timestep lies within a single period
+    period = np.maximum(np.searchsorted(start, times, side="right") - 1, 0)
+    within = (start[period] <= lower) & (upper <= end[period])
+    return np.where(within, values[period], average)
+
+
+def _to_utc(index):
+    if index.tz is not None:
+        return index.tz_convert(None)
+    return index
+
+
+def _to_nanoseconds(index):
+    # The resolution of a datetime index depends on how it was created
+    return np.asarray(index, dtype="datetime64[ns]").astype(np.int64)
+
+
+def get_file_keys(filenames):
+    """
+    Identify one or more files by their path, modification time, and size, so a changed file gives
+    a new cache key. A series can be split over multiple files, for example an ENTSO-E export for
+    each year.
+
+    Returns:
+        tuple: Path, modification time (ns), and size (bytes) of each file
+    """
+    if isinstance(filenames, str):
+        filenames = [filenames]
+    files = []
+    for filename in filenames:
+        status = os.stat(filename)
+        files.append((filename, status.st_mtime_ns, status.st_size))
+    return tuple(files)
+
+
+def _is_headerless(filename):
+    with open(filename) as file:
+        first = file.readline().split(",")[0]
+    try:
+        float(first)
+        return True
+    except ValueError:
+        return False
+
+
+def _get_periods(filename, column, index):
+    if _is_headerless(filename):
+        # The demand (kW) is hourly and starts at the first timestep of the index
+        values = pd.read_csv(filename, header=None)[0].to_numpy(dtype=np.float64) / 1000
+        hour = np.timedelta64(1, "h")
+        first = _to_utc(index)[0] - pd.Timedelta(hours=get_timestep(index) / 2)
+        start = np.datetime64(first.floor("h")) + np.arange(len(values)) * hour
+        return start, start + hour, values
+    periods = entsoe.import_data(filename, column)
+    return periods.index.to_numpy(), periods.end.to_numpy(), periods.value.to_numpy()
+
+
+@cache.memo(maxsize=8)
+def _import_aligned(files, column, index):
+    def calculate():
+        periods = [_get_periods(filename, column, index) for filename, _, _ in files]
+        start, end, values = (np.concatenate(arrays) for arrays in zip(*periods))
+        return {"values": align(start, end, values, index)}
+
+    # Use the aligned values if these files have been aligned to this index before
+    fingerprints = [cache.fingerprint_file(filename) for filename, _, _ in files]
+    key = cache.fingerprint(fingerprints, column, entsoe.version, index)
+    return cache.persist("aligned", key, calculate)["values"]
+
+
+def import_demand(filenames, index):
+    """
+    Import the demand from a file with the demand (kW) for each hour and without a header, which
+    starts at the first timestep of the index, or from one or more ENTSO-E exports of the actual
+    total load (MW).
+
+    Returns:
+        Series: Series with the average demand (MW) of each timestep
+    """
+    values = _import_aligned(get_file_keys(filenames), "Actual Total Load", index)
+    return pd.Series(values, index=index)
+
+
+def import_day_ahead_prices(filenames, index):
+    """
+    Import the day ahead prices from one or more ENTSO-E exports, which are converted from CET/CEST
+    to UTC and aligned to the timesteps of the index.
+
+    Returns:
+        Series: Series with the day ahead price (€/MWh) of each timestep
+    """
+    values = _import_aligned(get_file_keys(filenames), "Day-ahead Price", index)
+    return pd.Series(values, index=index)
@@ -1,68 +1,229 @@
-import streamlit as st
 import math
+import numpy as np
 import pandas as pd
+import cache
 
+# Growth of the wake radius per meter downstream, typical for offshore and coastal sites
+default_wake_decay = 0.05
 
-def _calculate_wind_speed_hub_height(row, parameters):
+# Width of the wind direction sectors (°), the KNMI wind direction is rounded to 10°
+sector_width = 10
+
+# Number of timesteps of which the wind speed of every turbine is calculated at the same time
+_chunksize = 2 ** 14
+
+
+def _calculate_wind_speed_hub_height(wind_speed, hub_height):
     roughness_length = 0.03
     knmi_height = 10
-    hub_height = parameters["wind"]["hub_height"]
     return (
-        row.wind_speed
+        wind_speed
         * math.log(hub_height / roughness_length)
         / math.log(knmi_height / roughness_length)
     )
 
 
-def _find_power_coefficient(speed, parameters):
-    power_coefficients = parameters["wind"]["power_coefficients"]
-    max_power_coefficient = power_coefficients.index.max()
-    if speed > max_power_coefficient:
-        return 0
+def _find_power_coefficient(speed, power_coefficients):
+    wind_speeds = power_coefficients.index.to_numpy(dtype=float)
+    values = power_coefficients.power_coefficient.to_numpy(dtype=float)
 
     # Interpolate the two closest power coefficients to estimate the power coefficient
-    pc_low = power_coefficients.at[math.floor(speed), "power_coefficient"]
-    pc_high = power_coefficients.at[math.ceil(speed), "power_coefficient"]
-    pc_low_share = math.ceil(speed) - speed
-    pc_high_share = speed - math.floor(speed)
-    return pc_low * pc_low_share + pc_high * pc_high_share
+    power_coefficient = np.interp(speed, wind_speeds, values)
 
+    # Return 0 for all wind speeds above the highest known power coefficient
+    return np.where(speed > wind_speeds.max(), 0, power_coefficient)
 
-def _calculate_hourly_power(row, parameters):
-    speed_hub_height = _calculate_wind_speed_hub_height(row, parameters)
-    swept_area = math.pi * (parameters["wind"]["rotor_diameter"] / 2) ** 2
+
+def _calculate_power(speed_hub_height, *, rotor_diameter, power_coefficients):
+    swept_area = math.pi * (rotor_diameter / 2) ** 2
     wind_power = 0.5 * swept_area * 1.225 * speed_hub_height ** 3
-    power_coefficient = _find_power_coefficient(speed_hub_height, parameters)
-    power_turbine = power_coefficient * wind_power / 10 ** 6
+    power_coefficient = _find_power_coefficient(speed_hub_height, power_coefficients)
+    return power_coefficient * wind_power / 10 ** 6
+
+
+def _calculate_turbine_power(
+    wind_speed, *, hub_height, rotor_diameter, power_coefficients
+):
+    speed_hub_height = _calculate_wind_speed_hub_height(wind_speed, hub_height)
+    return _calculate_power(
+        speed_hub_height,
+        rotor_diameter=rotor_diameter,
+        power_coefficients=power_coefficients,
+    )
+
+
+def _find_thrust_coefficient(power_coefficient):
+    # Use the axial induction of the actuator disc theory, for which Cp = 4a(1-a)² and Ct = 4a(1-a)
+    induction = np.linspace(0, 1 / 3, 1000)
+    power_coefficients = 4 * induction * (1 - induction) ** 2
+    induction = np.interp(power_coefficient, power_coefficients, induction)
+    return 4 * induction * (1 - induction)
+
+
+def _calculate_overlap(distance, wake_radius, rotor_radius):
+    # Calculate the fraction of the rotor area that lies within the wake
+    distance = np.maximum(distance, 1e-9)
+    cos_wake = (distance ** 2 + wake_radius ** 2 - rotor_radius ** 2) / (
+        2 * distance * wake_radius
+    )
+    cos_rotor = (distance ** 2 + rotor_radius ** 2 - wake_radius ** 2) / (
+        2 * distance * rotor_radius
+    )
+    lens = (
+        wake_radius ** 2 * np.arccos(np.clip(cos_wake, -1, 1))
+        + rotor_radius ** 2 * np.arccos(np.clip(cos_rotor, -1, 1))
+        - 0.5
+        * np.sqrt(
+            np.clip(
+                (-distance + wake_radius + rotor_radius)
+                * (distance + wake_radius - rotor_radius)
+                * (distance - wake_radius + rotor_radius)
+                * (distance + wake_radius + rotor_radius),
+                0,
+                None,
+            )
+        )
+    )
+    overlap = lens / (math.pi * rotor_radius ** 2)
+    overlap = np.where(distance <= wake_radius - rotor_radius, 1, overlap)
+    return np.where(distance >= wake_radius + rotor_radius, 0, overlap)
+
+
+def get_num_turbines(capacity, parameters):
+    """
+    Get the number of turbines required for at least the given capacity (MW).
+
+    Returns:
+        int: Number of turbines
+    """
+    return math.ceil(capacity / parameters["wind"]["rated_power"])
 
-    return parameters["wind"]["num_turbines"] * power_turbine
 
+@cache.memo(maxsize=16)
+def calculate_profile(wind_speed, hub_height, rotor_diameter, power_coefficients):
+    """
+    Calculate the output of a single turbine.
 
-def ask_input(parameters):
-    st.sidebar.title("💨 Wind power")
-    capacity_wind_approx = st.sidebar.number_input(
-        label="Required wind power capacity (MW)",
-        value=25,
-        min_value=0,
-        max_value=60,
-        step=5,
+    The profile only depends on the weather and the physical turbine parameters, so changing the
+    number of turbines does not require the profile to be recalculated.
+
+    Returns:
+        Series: Series with the average power (MW) of one turbine for each timestep
+    """
+    power = _calculate_turbine_power(
+        wind_speed.to_numpy(dtype=float),
+        hub_height=hub_height,
+        rotor_diameter=rotor_diameter,
+        power_coefficients=power_coefficients,
     )
+    return pd.Series(power, index=wind_speed.index)
+
 
-    rated_power = parameters["wind"]["rated_power"]
-    num_turbines = math.ceil(capacity_wind_approx / rated_power)
-    capacity_wind = num_turbines * rated_power
+def get_layout(num_turbines, *, rotor_diameter, spacing=7):
+    """
+    Place the turbines on a square grid, with the given spacing in rotor diameters.
 
-    # Show the number of installed turbines
-    st.sidebar.caption(
-        f"{num_turbines} turbines will be installed for a total of {capacity_wind}MW"
+    Returns:
+        ndarray: Coordinates (m) of the turbines to the east and north
+    """
+    num_columns = math.ceil(math.sqrt(num_turbines))
+    index = np.arange(num_turbines)
+    return np.column_stack([index % num_columns, index // num_columns]) * (
+        spacing * rotor_diameter
     )
 
-    # Add the parameters
-    parameters["wind"]["num_turbines"] = num_turbines
-    parameters["wind"]["capacity"] = capacity_wind
+
+@cache.memo(maxsize=16)
+def calculate_wake_factors(layout, rotor_diameter, wake_decay):
+    """
+    Calculate the combined wake of the upstream turbines on each turbine for every wind direction
+    sector, with the Jensen (Park) model and the sum of squares of the single wakes.
+
+    The velocity deficit of a turbine is the factor of its sector times 1 - sqrt(1 - Ct), so the
+    geometry only has to be calculated once for each sector.
+
+    Returns:
+        ndarray: Wake factors (sectors x turbines), the last row is for an unknown direction and has no wakes
+    """
+    layout = np.asarray(layout, dtype=float)
+    rotor_radius = rotor_diameter / 2
+    directions = np.radians(np.arange(0, 360, sector_width))
+
+    # The wind blows from the direction, so downwind is the opposite direction
+    downwind = -np.column_stack([np.sin(directions), np.cos(directions)])
+    offset = layout[np.newaxis, :, :] - layout[:, np.newaxis, :]
+    downstream = np.einsum("ijk,sk->sij", offset, downwind)
+    crosswind = np.sqrt(np.maximum(np.sum(offset ** 2, axis=2) - downstream ** 2, 0))
+
+    # Only turbines further downstream are in the wake
+    wake_radius = rotor_radius + wake_decay * np.maximum(downstream, 0)
+    overlap = _calculate_overlap(crosswind, wake_radius, rotor_radius)
+    deficit = np.where(downstream > 0, overlap * (rotor_radius / wake_radius) ** 2, 0)
+    factors = np.sqrt(np.sum(deficit ** 2, axis=1))
+    return np.vstack([factors, np.zeros(len(layout))])
+
+
+def _get_sectors(wind_direction):
+    # The KNMI uses 0 for calm and 990 for variable wind, which are treated as no wakes
+    wind_direction = np.asarray(wind_direction, dtype=float)
+    num_sectors = 360 // sector_width
+    sectors = np.round(wind_direction / sector_width).astype(int) % num_sectors
+    valid = (wind_direction > 0) & (wind_direction <= 360)
+    return np.where(valid, sectors, num_sectors)
+
+
+@cache.memo(maxsize=16)
+def calculate_farm_profile(
+    weather, layout, hub_height, rotor_diameter, power_coefficients, wake_decay
+):
+    """
+    Calculate the output of a wind farm with the given layout, including the wake losses.
+
+    Returns:
+        Series: Series with the average power (MW) of the farm for each timestep
+    """
+    factors = calculate_wake_factors(layout, rotor_diameter, wake_decay)
+    speed = _calculate_wind_speed_hub_height(
+        weather.wind_speed.to_numpy(dtype=float), hub_height
+    )
+    sectors = _get_sectors(weather.wind_direction)
+
+    # The thrust coefficient depends on the free stream wind speed
+    power_coefficient = _find_power_coefficient(speed, power_coefficients)
+    deficit = 1 - np.sqrt(1 - _find_thrust_coefficient(power_coefficient))
+
+    # Calculate the wind speed at every turbine in chunks, to limit the memory of long series
+    power = np.empty(len(speed))
+    for start in range(0, len(speed), _chunksize):
+        chunk = slice(start, start + _chunksize)
+        speed_turbines = speed[chunk, np.newaxis] * (
+            1 - deficit[chunk, np.newaxis] * factors[sectors[chunk]]
+        )
+        power[chunk] = _calculate_power(
+            speed_turbines,
+            rotor_diameter=rotor_diameter,
+            power_coefficients=power_coefficients,
+        ).sum(axis=1)
+    return pd.Series(power, index=weather.index)
 
 
-@st.experimental_memo
 def calculate(data, parameters):
-    # Calculate the average hourly wind power generation
-    return data.apply(_calculate_hourly_power, axis=1, parameters=parameters)
+    # Use the farm model when the positions of the turbines are known
+    if parameters["wind"].get("layout") is not None:
+        return calculate_farm_profile(
+            cache.select(data, ["wind_speed", "wind_direction"]),
+            layout=np.asarray(parameters["wind"]["layout"], dtype=float),
+            hub_height=parameters["wind"]["hub_height"],
+            rotor_diameter=parameters["wind"]["rotor_diameter"],
+            power_coefficients=parameters["wind"]["power_coefficients"],
+            wake_decay=parameters["wind"].get("wake_decay", default_wake_decay),
+        )
+
+    # Scale the output of a single turbine to the whole wind park
+    profile = calculate_profile(
+        cache.select(data, "wind_speed"),
+        hub_height=parameters["wind"]["hub_height"],
+        rotor_diameter=parameters["wind"]["rotor_diameter"],
+        power_coefficients=parameters["wind"]["power_coefficients"],
+    )
+    return profile * parameters["wind"]["num_turbines"]
@@ -0,0 +1,16 @@
+import os
+import sys
+import pytest
+
+# The modules are imported by their name from the src directory, like the app and scripts do
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+import cache
+
+
+@pytest.fixture(autouse=True)
+def cache_directory(tmp_path, monkeypatch):
+    # Every test uses its own cache directory, so no cache files are shared between tests
+    monkeypatch.setattr(cache, "directory", str(tmp_path / "cache"))
+    cache.clear_memos()
+    return cache.directory
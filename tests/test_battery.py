@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+import battery
+
+
+def _simulate_baseline(surplus, power_rating, energy_rating, efficiency):
+    # The hourly simulation of the original question 6, one row at a time
+    soc_prev = 0
+    soc, flow = [], []
+    for value in surplus:
+        potential_flow = min(max(value * efficiency, -power_rating), power_rating)
+        battery_soc = min(max(soc_prev + potential_flow / energy_rating, 0), 1)
+        flow.append((battery_soc - soc_prev) * energy_rating)
+        soc.append(battery_soc)
+        soc_prev = battery_soc
+    return np.array(soc), np.array(flow)
+
+
+@pytest.fixture
+def surplus():
+    return np.random.default_rng(0).normal(0, 8, 500)
+
+
+def test_simulate_matches_the_baseline(surplus):
+    simulation = battery.simulate(surplus, 5, 10, 0.9)
+    soc, flow = _simulate_baseline(surplus, 5, 10, 0.9)
+
+    np.testing.assert_allclose(simulation.soc[:, 0], soc, rtol=0, atol=1e-12)
+    np.testing.assert_allclose(simulation.flow[:, 0], flow, rtol=0, atol=1e-12)
+
+
+def test_scalar_and_vector_paths_are_equal(surplus):
+    num_configurations = battery._max_scalar_configurations + 1
+    power_ratings = np.linspace(1, 10, num_configurations)
+    energy_ratings = np.linspace(2, 40, num_configurations)
+
+    # A batch larger than the scalar limit is simulated with one numpy operation per timestep
+    vector = battery.simulate(surplus, power_ratings, energy_ratings, 0.9, timestep=0.25)
+    for configuration in range(num_configurations):
+        scalar = battery.simulate(
+            surplus,
+            power_ratings[configuration],
+            energy_ratings[configuration],
+            0.9,
+            timestep=0.25,
+        )
+        np.testing.assert_allclose(vector.soc[:, configuration], scalar.soc[:, 0], atol=1e-12)
+        np.testing.assert_allclose(vector.flow[:, configuration], scalar.flow[:, 0], atol=1e-9)
+        np.testing.assert_allclose(vector.unserved[configuration], scalar.unserved[0])
+
+
+def test_get_grid_flow_takes_the_losses_when_charging():
+    grid_flow = battery.get_grid_flow(np.array([0.9, 0, -1]), 0.9)
+
+    np.testing.assert_allclose(grid_flow, [1, 0, -1])
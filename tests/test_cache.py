@@ -0,0 +1,80 @@
+import os
+import subprocess
+import sys
+import numpy as np
+import pandas as pd
+import cache
+
+# The values are created in the same way in this process and in a new process
+_create_values = """
+import numpy as np
+import pandas as pd
+values = [
+    np.arange(6.0).reshape(2, 3),
+    np.array(["wind", None, 1.5], dtype=object),
+    pd.DataFrame({"a": [1.0, 2.0], "b": ["x", "y"]}, index=pd.date_range("2018", periods=2)),
+    {"storage": {"efficiency": 0.9, "dispatch": "greedy"}, "years": (2018, 2019)},
+]
+"""
+
+
+def test_fingerprint_is_stable_across_processes():
+    namespace = {}
+    exec(_create_values, namespace)
+    expected = cache.fingerprint(*namespace["values"])
+
+    # A different hash seed changes the order of sets and the hashes of strings
+    script = _create_values + "import cache\nprint(cache.fingerprint(*values))"
+    environment = {**os.environ, "PYTHONHASHSEED": "123", "PYTHONPATH": os.pathsep.join(sys.path)}
+    output = subprocess.run(
+        [sys.executable, "-c", script], env=environment, capture_output=True, text=True, check=True
+    )
+
+    assert output.stdout.strip() == expected
+
+
+def test_fingerprint_distinguishes_nested_values():
+    assert cache.fingerprint([np.array([1, 2]), np.array([3])]) != cache.fingerprint(
+        [np.array([1]), np.array([2, 3])]
+    )
+    assert cache.fingerprint(np.zeros((2, 3))) != cache.fingerprint(np.zeros((3, 2)))
+    assert cache.fingerprint(np.zeros(2, dtype=np.int64)) != cache.fingerprint(np.zeros(2))
+    assert cache.fingerprint(["ab", "c"]) != cache.fingerprint(["a", "bc"])
+
+
+def test_freeze_copies_the_arrays_of_the_caller():
+    values = np.arange(3.0)
+
+    frozen = cache.freeze(values)
+
+    assert values.flags.writeable
+    assert not frozen.flags.writeable
+
+
+def test_fingerprint_changes_when_a_frozen_frame_is_changed():
+    frame = cache.freeze(pd.DataFrame({"a": np.arange(1000.0)}))
+    frozen = cache.fingerprint(frame)
+
+    # The signature samples the first and last rows among others
+    frame.iloc[-1, 0] = -1
+    assert cache.fingerprint(frame) == cache.fingerprint(frame.copy()) != frozen
+
+    frame["b"] = 0.0
+    assert cache.fingerprint(frame) == cache.fingerprint(frame.copy())
+
+
+def test_persist_removes_the_least_recently_used_files(monkeypatch):
+    arrays = {"values": np.zeros(1000)}
+    cache.persist("test", "old", lambda: arrays)
+    size = os.path.getsize(cache.get_path("test_old.npz"))
+
+    # Make the first file older than the second, then use it again
+    cache.persist("test", "new", lambda: arrays)
+    os.utime(cache.get_path("test_old.npz"), ns=(0, 0))
+    os.utime(cache.get_path("test_new.npz"), ns=(1, 1))
+    cache.persist("test", "old", lambda: None)
+
+    monkeypatch.setattr(cache, "max_bytes", 2 * size)
+    cache.persist("test", "third", lambda: arrays)
+
+    assert sorted(os.listdir(cache.directory)) == ["test_old.npz", "test_third.npz"]
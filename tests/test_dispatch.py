@@ -0,0 +1,23 @@
+import numpy as np
+import battery
+import dispatch
+
+
+def test_optimize_leaves_no_more_unserved_energy_than_greedy():
+    random = np.random.default_rng(1)
+    surplus = random.normal(0, 6, 96)
+    prices = random.uniform(20, 80, 96)
+
+    greedy = battery.simulate(surplus, 5, 10, 0.9)
+    optimized = dispatch.optimize(
+        surplus,
+        prices,
+        power_rating=5,
+        energy_rating=10,
+        efficiency=0.9,
+        window=None,
+    )
+
+    assert optimized.unserved[0] <= greedy.unserved[0] + 1e-6
+    assert np.all((optimized.soc >= -1e-9) & (optimized.soc <= 1 + 1e-9))
+    assert np.all(np.abs(optimized.flow) <= 5 + 1e-6)
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import entsoe
+import timeseries
+
+
+def _write_export(path, rows):
+    lines = ['"MTU (CET)","Day-ahead Price [EUR/MWh]","BZN|NL"']
+    lines += [f'"{period}","{value}"' for period, value in rows]
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+def test_import_data_converts_the_start_of_summer_time(tmp_path):
+    filename = _write_export(
+        tmp_path / "spring.csv",
+        [
+            ("25.03.2018 00:00 - 25.03.2018 01:00", "10"),
+            ("25.03.2018 01:00 - 25.03.2018 02:00", "20"),
+            ("25.03.2018 02:00 - 25.03.2018 03:00", ""),
+            ("25.03.2018 03:00 - 25.03.2018 04:00", "30"),
+        ],
+    )
+
+    data = entsoe.import_data(filename, "Day-ahead Price")
+
+    # The hour from 02:00 to 03:00 does not exist, so it is dropped
+    expected = ["2018-03-24T23:00", "2018-03-25T00:00", "2018-03-25T01:00"]
+    np.testing.assert_array_equal(data.index, np.array(expected, dtype="datetime64[ns]"))
+    np.testing.assert_array_equal(data.end - data.index, np.timedelta64(1, "h"))
+    np.testing.assert_array_equal(data.value, [10, 20, 30])
+
+
+def test_import_data_keeps_the_repeated_hour_at_the_end_of_summer_time(tmp_path):
+    filename = _write_export(
+        tmp_path / "autumn.csv",
+        [
+            ("28.10.2018 01:00 - 28.10.2018 02:00", "10"),
+            ("28.10.2018 02:00 - 28.10.2018 03:00", "20"),
+            ("28.10.2018 02:00 - 28.10.2018 03:00", "30"),
+            ("28.10.2018 03:00 - 28.10.2018 04:00", "40"),
+        ],
+    )
+
+    data = entsoe.import_data(filename, "Day-ahead Price")
+
+    # The first 02:00 is still summer time and the second is winter time
+    expected = np.datetime64("2018-10-27T23:00", "ns") + np.arange(4) * np.timedelta64(1, "h")
+    np.testing.assert_array_equal(data.index, expected)
+    np.testing.assert_array_equal(data.value, [10, 20, 30, 40])
+
+
+def test_import_day_ahead_prices_aligns_the_export_to_the_weather(tmp_path):
+    rows = [
+        (f"28.10.2018 {hour:02d}:00 - 28.10.2018 {hour + 1:02d}:00", str(hour))
+        for hour in range(4)
+    ]
+    rows.insert(3, ("28.10.2018 02:00 - 28.10.2018 03:00", "2.5"))
+    filename = _write_export(tmp_path / "prices.csv", rows)
+
+    # The weather has a timestamp in the middle of each hour in UTC
+    index = pd.date_range("2018-10-27 22:30", periods=5, freq="60min")
+    prices = timeseries.import_day_ahead_prices(filename, index)
+
+    np.testing.assert_array_equal(prices, [0, 1, 2, 2.5, 3])
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+import stats
+
+
+@pytest.fixture
+def values():
+    values = np.random.default_rng(2).gamma(2, 3, 100_000)
+    values[::997] = np.nan
+    return values
+
+
+def test_summary_of_chunks_matches_pandas(values):
+    summary = stats.Summary()
+    for chunk in np.array_split(values, 7):
+        summary.update(chunk)
+
+    series = pd.Series(values)
+    assert summary.count == series.count()
+    assert summary.mean == pytest.approx(series.mean(), rel=1e-12)
+    assert summary.std() == pytest.approx(series.std(), rel=1e-12)
+    assert summary.minimum == series.min()
+    assert summary.maximum == series.max()
+    assert summary.quantile(0.5) == pytest.approx(series.median(), rel=1e-2)
+
+
+def test_merge_equals_a_single_summary(values):
+    single = stats.Summary()
+    single.update(values)
+
+    merged = stats.Summary()
+    for chunk in np.array_split(values, 3):
+        part = stats.Summary()
+        part.update(chunk)
+        merged.merge(part)
+
+    assert merged.count == single.count
+    assert merged.mean == pytest.approx(single.mean, rel=1e-12)
+    assert merged.variance() == pytest.approx(single.variance(), rel=1e-12)
+    assert merged.quantile(0.9) == pytest.approx(single.quantile(0.9), rel=1e-2)
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import timeseries
+
+
+def _get_periods(start, frequency, values):
+    start = pd.date_range(start, periods=len(values), freq=frequency)
+    return start, start + pd.Timedelta(frequency), np.asarray(values, dtype=float)
+
+
+def test_align_averages_shorter_periods():
+    start, end, values = _get_periods("2018-01-01", "15min", [1, 2, 3, 4, 5, 6, 7, 8])
+    index = pd.date_range("2018-01-01 00:30", periods=2, freq="60min")
+
+    np.testing.assert_allclose(timeseries.align(start, end, values, index), [2.5, 6.5])
+
+
+def test_align_repeats_longer_periods_exactly():
+    start, end, values = _get_periods("2018-01-01", "60min", [0.1, 0.2])
+    index = pd.date_range("2018-01-01 00:07:30", periods=8, freq="15min")
+
+    aligned = timeseries.align(start, end, values, index)
+
+    np.testing.assert_array_equal(aligned, np.repeat(values, 4))
+
+
+def test_align_leaves_out_missing_values_and_gaps():
+    start, end, values = _get_periods("2018-01-01", "30min", [1, np.nan, 3, 5])
+    index = pd.date_range("2018-01-01 00:30", periods=3, freq="60min")
+
+    # The second hour only has data in its last half, and the third hour has no data at all
+    start, end, values = start[[0, 1, 3]], end[[0, 1, 3]], values[[0, 1, 3]]
+    aligned = timeseries.align(start, end, values, index)
+
+    np.testing.assert_array_equal(aligned, [1, 5, np.nan])
+
+
+def test_align_uses_utc_for_an_index_with_a_time_zone():
+    start, end, values = _get_periods("2018-01-01", "60min", [1, 2, 3])
+    index = pd.date_range("2018-01-01 01:30", periods=2, freq="60min", tz="Europe/Amsterdam")
+
+    np.testing.assert_array_equal(timeseries.align(start, end, values, index), [1, 2])
+
+
+def test_get_timestep_does_not_depend_on_the_resolution_of_the_index():
+    index = pd.date_range("2018-01-01", periods=3, freq="D")
+    seconds = pd.DatetimeIndex(index.to_numpy().astype("datetime64[s]"))
+
+    assert timeseries.get_timestep(index) == 24
+    assert timeseries.get_timestep(seconds) == 24
+
+
+def test_get_calendar_days_maps_february_29_to_february_28():
+    index = pd.DatetimeIndex(["2020-02-28", "2020-02-29", "2020-03-01", "2020-12-31"])
+
+    np.testing.assert_array_equal(timeseries.get_calendar_days(index), [58, 58, 59, 364])